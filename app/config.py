@@ -2,10 +2,20 @@
 Simple application configuration.
 """
 
-from pydantic import Field
+from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+class BotConfig(BaseModel):
+    """One bot served by a multi-bot process; unset fields fall back to global settings."""
+
+    name: str = Field(pattern=r"^[A-Za-z0-9_-]+$", description="Short name, used in webhook path")
+    token: str = Field(description="Telegram Bot Token from BotFather")
+    project_name: str | None = Field(default=None, description="Name used in greetings")
+    default_role_name: str | None = Field(default=None, description="Role preset for new users")
+    default_role_prompt: str | None = Field(default=None, description="Prompt of that preset")
+
+
 class Settings(BaseSettings):
     """Application settings."""
 
@@ -20,6 +30,22 @@ class Settings(BaseSettings):
         description="Database connection URL",
     )
 
+    # Multi-bot mode: several bots share one process, DB pool and OpenAI client.
+    # JSON list, e.g. [{"name": "support", "token": "123:ABC", "project_name": "Support"}];
+    # when set, BOT_TOKEN is ignored.
+    bots: list[BotConfig] = Field(default_factory=list, description="Bots served by this process")
+
+    # Admin Telegram user IDs allowed to run /stats and /memory, e.g. [12345]
+    admin_ids: list[int] = Field(default_factory=list, description="Admin Telegram user IDs")
+
+    # Database driver tuning (asyncpg)
+    db_prepared_statement_cache_size: int = Field(
+        default=100, description="Prepared statements cached per asyncpg connection (0 disables)"
+    )
+    db_prewarm_statements: bool = Field(
+        default=True, description="Prepare hot queries when a pool connection is opened"
+    )
+
     # Environment settings
     environment: str = Field(default="development", description="Environment")
     debug: bool = Field(default=False, description="Debug mode")
@@ -30,6 +56,106 @@ class Settings(BaseSettings):
     # Server port configuration
     server_port: int = Field(default=8000, description="Server port for webhook mode")
 
+    # Polling mode (used when WEBHOOK_URL is not set)
+    polling_timeout: int = Field(default=30, description="getUpdates long-poll timeout in seconds")
+    polling_limit: int = Field(default=100, ge=1, le=100, description="Max updates per getUpdates")
+    polling_max_concurrency: int = Field(
+        default=16, ge=1, description="Max update handlers running at once (per process)"
+    )
+    polling_allowed_updates: list[str] | None = Field(
+        default=None, description="Update types to request (default: types with handlers)"
+    )
+
+    # Near-duplicate prompt cache (MinHash over character n-grams, fully local)
+    prompt_cache_enabled: bool = Field(
+        default=False, description="Reuse answers to similar prompts"
+    )
+    prompt_cache_threshold: float = Field(
+        default=0.9, description="Minimum estimated similarity for a cache hit"
+    )
+    prompt_cache_role_thresholds: dict[str, float] = Field(
+        default_factory=dict, description='Per-role similarity thresholds, e.g. {"coder": 0.97}'
+    )
+    prompt_cache_max_entries: int = Field(default=20_000, description="Max cached prompts")
+    prompt_cache_max_mb: int = Field(default=16, description="Memory cap for the prompt cache")
+    prompt_cache_num_hashes: int = Field(default=64, description="MinHash signature length")
+    prompt_cache_ngram: int = Field(default=4, description="Character n-gram size")
+
+    # Message debouncing (merge quick consecutive messages into one AI request)
+    debounce_window_ms: int = Field(
+        default=0, description="Wait this long for follow-up messages (0 disables)"
+    )
+    debounce_max_delay_ms: int = Field(
+        default=5000, description="Upper bound for how long a message can be held back"
+    )
+
+    # Update deduplication (Telegram re-delivers slow webhook updates)
+    dedup_ttl_seconds: float = Field(default=3600.0, description="How long update ids are kept")
+    dedup_max_size: int = Field(default=10_000, description="Max update ids kept in memory")
+    dedup_use_database: bool = Field(
+        default=False, description="Share seen update ids across replicas via Postgres"
+    )
+    dedup_cleanup_every: int = Field(
+        default=500, description="Delete expired update ids after this many inserts"
+    )
+
+    # Conversation history (/history)
+    history_page_size: int = Field(default=5, description="Conversations per /history page")
+    history_preview_chars: int = Field(
+        default=80, description="Characters of each message shown in /history previews"
+    )
+
+    # Admin statistics
+    stats_refresh_interval: float = Field(
+        default=300.0, description="Seconds a /stats snapshot is reused before recomputing"
+    )
+
+    # Logging (queued, written by a background thread)
+    log_level: str = Field(default="INFO", description="Root log level")
+    log_format: str = Field(default="json", description="json or text")
+    log_sample_rate: float = Field(
+        default=1.0, description="Fraction of updates whose high-volume info lines are kept"
+    )
+    log_queue_size: int = Field(
+        default=10_000, description="Records buffered for the writer thread before dropping"
+    )
+
+    # Health and readiness probes
+    health_check_interval: float = Field(
+        default=15.0, description="Seconds between background database/Bot API probes"
+    )
+    health_check_timeout: float = Field(
+        default=5.0, description="Seconds before a single probe is considered failed"
+    )
+
+    # Memory observability
+    memory_report_interval: float = Field(
+        default=300.0, description="Seconds between memory reports (0 disables)"
+    )
+    memory_warn_fraction: float = Field(
+        default=0.85, description="Warn when RSS exceeds this fraction of the cgroup limit"
+    )
+    tracemalloc_enabled: bool = Field(
+        default=False, description="Trace allocations from startup (costs memory and CPU)"
+    )
+    tracemalloc_frames: int = Field(default=1, description="Stack frames kept per allocation")
+
+    # Cross-replica cache invalidation (PostgreSQL LISTEN/NOTIFY)
+    invalidation_enabled: bool = Field(
+        default=False, description="Evict in-process caches when other replicas change data"
+    )
+    invalidation_channel: str = Field(
+        default="cache_invalidation", description="NOTIFY channel shared by all replicas"
+    )
+    invalidation_keepalive: float = Field(
+        default=30.0, description="Seconds between listener connection health checks"
+    )
+
+    # Graceful shutdown
+    shutdown_grace_period: float = Field(
+        default=20.0, description="Seconds to let in-flight updates finish on shutdown"
+    )
+
     # Project settings
     project_name: str = Field(
         default="Hello AI Bot", description="Project name for greetings and display"
@@ -46,6 +172,23 @@ class Settings(BaseSettings):
     max_requests_per_hour: int = Field(default=60, description="Rate limit per user")
     max_tokens_per_request: int = Field(default=4000, description="Token limit per request")
 
+    # Outbound Telegram rate limiting (Bot API flood limits)
+    telegram_global_rate: float = Field(
+        default=30.0, description="Max outgoing messages per second across all chats"
+    )
+    telegram_chat_rate: float = Field(
+        default=1.0, description="Max outgoing messages per second to a single chat"
+    )
+    telegram_max_retries: int = Field(
+        default=3, description="Retries for a request rejected with RetryAfter"
+    )
+    telegram_chat_action_ttl: float = Field(
+        default=3.0, description="Seconds during which a repeated chat action is skipped"
+    )
+    typing_refresh_interval: float = Field(
+        default=4.0, description="Seconds between typing indicator refreshes"
+    )
+
 
 # Global settings instance
 settings = Settings()
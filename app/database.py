@@ -4,8 +4,27 @@ Simple database module combining models, session, and engine.
 
 from collections.abc import AsyncGenerator
 from datetime import datetime
-
-from sqlalchemy import BigInteger, ForeignKey, Integer, String, Text, func, select
+from typing import Any
+
+from sqlalchemy import (
+    BigInteger,
+    Connection,
+    ForeignKey,
+    Index,
+    Integer,
+    StatementLambdaElement,
+    String,
+    Text,
+    event,
+    func,
+    insert,
+    inspect,
+    lambda_stmt,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncAttrs, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
@@ -32,12 +51,19 @@ class User(Base, TimestampMixin):
     """Telegram user model."""
 
     __tablename__: str = "users"
+    __table_args__ = (
+        # The same Telegram user is a separate user of every bot
+        Index("uq_users_bot_id_telegram_id", "bot_id", "telegram_id", unique=True),
+    )
 
     # Primary key
     id: Mapped[int] = mapped_column(primary_key=True)
 
+    # Telegram bot the user talks to (0 for rows created before multi-bot mode)
+    bot_id: Mapped[int] = mapped_column(BigInteger, default=0, server_default=text("0"))
+
     # Telegram user information
-    telegram_id: Mapped[int] = mapped_column(BigInteger, unique=True, index=True)
+    telegram_id: Mapped[int] = mapped_column(BigInteger, index=True)
     username: Mapped[str | None] = mapped_column(String(255), nullable=True)
     first_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
     last_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
@@ -58,6 +84,23 @@ class User(Base, TimestampMixin):
         return " ".join(part for part in parts if part)
 
 
+# Name of the preset role assigned to new users
+DEFAULT_ROLE_NAME = "helpful_assistant"
+
+
+class Role(Base, TimestampMixin):
+    """Named role preset shared by many users."""
+
+    __tablename__: str = "roles"
+
+    # Primary key
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+    # Role information
+    name: Mapped[str] = mapped_column(String(50), unique=True)
+    prompt: Mapped[str] = mapped_column(Text)
+
+
 class UserRole(Base, TimestampMixin):
     """User's AI assistant role preference."""
 
@@ -69,15 +112,23 @@ class UserRole(Base, TimestampMixin):
     # Foreign key to user
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), unique=True, index=True)
 
-    # Role information
-    role_name: Mapped[str] = mapped_column(String(50), default="helpful_assistant")
-    role_prompt: Mapped[str] = mapped_column(Text, default="You are a helpful AI assistant.")
+    # Preset role (prompt is shared via the roles table)
+    role_id: Mapped[int | None] = mapped_column(ForeignKey("roles.id"), nullable=True, index=True)
+
+    # Role information; role_prompt is only set for custom per-user prompts
+    role_name: Mapped[str] = mapped_column(String(50), default=DEFAULT_ROLE_NAME)
+    role_prompt: Mapped[str | None] = mapped_column(Text, nullable=True, default=None)
 
 
 class Conversation(Base, TimestampMixin):
     """User conversation history."""
 
     __tablename__: str = "conversations"
+    __table_args__ = (
+        Index("ix_conversations_created_at", "created_at"),
+        # Keyset pagination of a user's history on (created_at, id)
+        Index("ix_conversations_user_created_id", "user_id", "created_at", "id"),
+    )
 
     # Primary key
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -93,6 +144,49 @@ class Conversation(Base, TimestampMixin):
     role_used: Mapped[str] = mapped_column(String(50))
 
 
+class ProcessedUpdate(Base):
+    """Telegram update already handled by some replica (webhook/polling deduplication)."""
+
+    __tablename__: str = "processed_updates"
+
+    # Update ids are only unique per bot
+    bot_id: Mapped[int] = mapped_column(
+        BigInteger, primary_key=True, autoincrement=False, default=0, server_default=text("0")
+    )
+    update_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
+    created_at: Mapped[datetime] = mapped_column(
+        default=func.now(), server_default=func.now(), index=True
+    )
+
+
+# Hot-path statements, built once and cached by SQLAlchemy (lambda statements
+# skip rebuilding the construct and recomputing its cache key on every message)
+def select_user_by_telegram_id(telegram_id: int, bot_id: int) -> StatementLambdaElement:
+    """SELECT user of a bot by Telegram ID."""
+    return lambda_stmt(
+        lambda: select(User).where(User.bot_id == bot_id, User.telegram_id == telegram_id)
+    )
+
+
+def select_user_role_by_user_id(user_id: int) -> StatementLambdaElement:
+    """SELECT user role by user ID."""
+    return lambda_stmt(lambda: select(UserRole).where(UserRole.user_id == user_id))
+
+
+CONVERSATION_INSERT = insert(Conversation)
+
+
+def _is_asyncpg(url: str) -> bool:
+    return make_url(url).drivername == "postgresql+asyncpg"
+
+
+def _engine_connect_args(url: str) -> dict[str, Any]:
+    """Driver arguments; asyncpg keeps a per-connection prepared statement cache."""
+    if _is_asyncpg(url):
+        return {"prepared_statement_cache_size": settings.db_prepared_statement_cache_size}
+    return {}
+
+
 # Create engine and session with optimized pool for shared PostgreSQL
 engine = create_async_engine(
     settings.database_url,
@@ -102,8 +196,32 @@ engine = create_async_engine(
     max_overflow=3,  # Reduced overflow
     pool_timeout=30,
     pool_recycle=3600,
+    connect_args=_engine_connect_args(settings.database_url),
 )
 
+
+def prewarm_statements(dbapi_connection: Any, connection_record: Any) -> None:
+    """
+    Prepare hot SELECTs on each new pooled connection.
+
+    Running them once with parameters that match nothing puts them into the
+    driver's prepared statement cache before the first user message arrives.
+    """
+    dialect = engine.dialect
+    cursor = dbapi_connection.cursor()
+    try:
+        for stmt in (select_user_by_telegram_id(-1, -1), select_user_role_by_user_id(-1)):
+            compiled = stmt.compile(dialect=dialect)
+            params = compiled.construct_params()
+            cursor.execute(str(compiled), tuple(params[name] for name in compiled.positiontup))
+        dbapi_connection.rollback()
+    finally:
+        cursor.close()
+
+
+if _is_asyncpg(settings.database_url) and settings.db_prewarm_statements:
+    event.listen(engine.sync_engine, "connect", prewarm_statements)
+
 AsyncSessionLocal = async_sessionmaker(
     bind=engine,
     class_=AsyncSession,
@@ -124,31 +242,127 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+def upgrade_schema(conn: Connection) -> None:
+    """
+    Bring existing tables in line with the models.
+
+    create_all() skips tables that already exist, so new nullable columns and
+    indexes are added here, indexes whose uniqueness changed are rebuilt and
+    relaxed NOT NULL constraints are dropped.
+    """
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+
+        existing_columns = {column["name"]: column for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            existing = existing_columns.get(column.name)
+            if existing is None:
+                column_type = column.type.compile(dialect=conn.dialect)
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"
+                if column.server_default is not None:
+                    default = column.server_default.arg  # type: ignore[attr-defined]
+                    ddl += f" DEFAULT {default.text if hasattr(default, 'text') else default}"
+                conn.execute(text(ddl))
+            elif column.nullable and not existing["nullable"] and conn.dialect.name == "postgresql":
+                conn.execute(
+                    text(f"ALTER TABLE {table.name} ALTER COLUMN {column.name} DROP NOT NULL")
+                )
+
+        existing_indexes = {index["name"]: index for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            existing = existing_indexes.get(index.name)
+            if existing is not None and bool(existing["unique"]) != index.unique:
+                # e.g. users.telegram_id stopped being unique on its own
+                index.drop(conn)
+            index.create(conn, checkfirst=True)
+
+
 async def create_tables() -> None:
     """Create all tables."""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(upgrade_schema)
+
+
+async def adopt_unscoped_users(session: AsyncSession, bot_id: int) -> int:
+    """
+    Assign users created before multi-bot mode (bot_id 0) to a bot.
+
+    Returns:
+        Number of adopted users
+    """
+    if not bot_id:
+        return 0
+    result = await session.execute(update(User).where(User.bot_id == 0).values(bot_id=bot_id))
+    await session.commit()
+    return result.rowcount
 
 
 # Helper functions for AI functionality
-async def get_or_create_user_role(session: AsyncSession, user_id: int) -> UserRole:
-    """Get or create user role with default settings."""
-    stmt = select(UserRole).where(UserRole.user_id == user_id)
-    result = await session.execute(stmt)
+async def get_or_create_user_role(
+    session: AsyncSession,
+    user_id: int,
+    role_name: str = DEFAULT_ROLE_NAME,
+    role_prompt: str | None = None,
+) -> UserRole:
+    """Get or create user role, assigning the given preset (default preset by default)."""
+    result = await session.execute(select_user_role_by_user_id(user_id))
     user_role = result.scalar_one_or_none()
 
     if not user_role:
-        user_role = UserRole(
-            user_id=user_id,
-            role_name="helpful_assistant",
-            role_prompt=settings.default_role_prompt,
+        role = await get_or_create_role(
+            session, role_name, role_prompt or settings.default_role_prompt
         )
+        user_role = UserRole(user_id=user_id, role_id=role.id, role_name=role.name)
         session.add(user_role)
         await session.commit()
 
     return user_role
 
 
+async def get_or_create_role(session: AsyncSession, name: str, prompt: str) -> Role:
+    """Get role preset by name or create it with the given prompt."""
+    stmt = select(Role).where(Role.name == name)
+    result = await session.execute(stmt)
+    role = result.scalar_one_or_none()
+
+    if not role:
+        role = Role(name=name, prompt=prompt)
+        session.add(role)
+        await session.flush()
+
+    return role
+
+
+async def assign_role(session: AsyncSession, role: Role, user_ids: list[int] | None = None) -> int:
+    """
+    Switch users to a preset role in one statement.
+
+    Args:
+        session: Database session
+        role: Preset role to assign
+        user_ids: Users to switch (all users when None)
+
+    Returns:
+        Number of updated user roles
+    """
+    stmt = update(UserRole).values(role_id=role.id, role_name=role.name, role_prompt=None)
+    if user_ids is not None:
+        stmt = stmt.where(UserRole.user_id.in_(user_ids))
+    result = await session.execute(stmt)
+    await session.commit()
+    return result.rowcount
+
+
+async def save_conversation(session: AsyncSession, **values: Any) -> None:
+    """Insert a conversation row using the prebuilt INSERT statement."""
+    await session.execute(CONVERSATION_INSERT, [values])
+    await session.commit()
+
+
 async def get_conversation_history(
     session: AsyncSession, user_id: int, limit: int = 5
 ) -> list[Conversation]:
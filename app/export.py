@@ -0,0 +1,232 @@
+"""
+Streaming export of conversations to JSONL or Parquet.
+
+Rows are read through a server-side cursor in bounded batches and written
+incrementally, so memory stays flat regardless of table size.
+
+Usage:
+    python -m app.export conversations.jsonl --since 2025-01-01 --model gpt-4o
+    python -m app.export conversations.jsonl --resume
+    python -m app.export conversations.parquet --format parquet --after-id 100000
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from collections.abc import AsyncIterator, Sequence
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Any
+
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import AsyncSessionLocal, Conversation, User, engine
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is only needed for --format parquet
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+# Exported columns, in output order
+EXPORT_COLUMNS = (
+    Conversation.id,
+    Conversation.user_id,
+    User.telegram_id,
+    Conversation.user_message,
+    Conversation.ai_response,
+    Conversation.model_used,
+    Conversation.tokens_used,
+    Conversation.role_used,
+    Conversation.created_at,
+)
+COLUMN_NAMES = tuple(column.key for column in EXPORT_COLUMNS)
+
+
+def build_query(
+    bot_id: int | None = None,
+    user_id: int | None = None,
+    telegram_id: int | None = None,
+    model: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    after_id: int | None = None,
+) -> Select[Any]:
+    """Build export query; ordered by id so exports can resume from the last id."""
+    stmt = select(*EXPORT_COLUMNS).join(User, User.id == Conversation.user_id)
+    if bot_id is not None:
+        stmt = stmt.where(User.bot_id == bot_id)
+    if user_id is not None:
+        stmt = stmt.where(Conversation.user_id == user_id)
+    if telegram_id is not None:
+        stmt = stmt.where(User.telegram_id == telegram_id)
+    if model is not None:
+        stmt = stmt.where(Conversation.model_used == model)
+    if since is not None:
+        stmt = stmt.where(Conversation.created_at >= since)
+    if until is not None:
+        stmt = stmt.where(Conversation.created_at < until)
+    if after_id is not None:
+        stmt = stmt.where(Conversation.id > after_id)
+    return stmt.order_by(Conversation.id)
+
+
+async def iter_batches(
+    session: AsyncSession, stmt: Select[Any], batch_size: int
+) -> AsyncIterator[Sequence[Any]]:
+    """Stream rows in batches of at most `batch_size` using a server-side cursor."""
+    result = await session.stream(stmt.execution_options(yield_per=batch_size))
+    async for partition in result.partitions(batch_size):
+        yield partition
+
+
+def row_to_dict(row: Any) -> dict[str, Any]:
+    """Convert result row to a JSON-friendly dict."""
+    record = dict(zip(COLUMN_NAMES, row, strict=True))
+    if record["created_at"] is not None:
+        record["created_at"] = record["created_at"].isoformat()
+    return record
+
+
+async def export_jsonl(
+    session: AsyncSession, stmt: Select[Any], output: IO[str], batch_size: int
+) -> tuple[int, int | None]:
+    """Write rows as JSON lines; returns (rows written, last exported id)."""
+    count, last_id = 0, None
+    async for batch in iter_batches(session, stmt, batch_size):
+        output.writelines(json.dumps(row_to_dict(row), ensure_ascii=False) + "\n" for row in batch)
+        output.flush()
+        count += len(batch)
+        last_id = batch[-1][0]
+    return count, last_id
+
+
+async def export_parquet(
+    session: AsyncSession, stmt: Select[Any], path: Path, batch_size: int
+) -> tuple[int, int | None]:
+    """Write rows as Parquet, one row group per batch; returns (rows written, last id)."""
+    if pa is None or pq is None:
+        raise RuntimeError("Parquet export requires pyarrow: pip install pyarrow")
+
+    schema = pa.schema(
+        [
+            ("id", pa.int64()),
+            ("user_id", pa.int64()),
+            ("telegram_id", pa.int64()),
+            ("user_message", pa.string()),
+            ("ai_response", pa.string()),
+            ("model_used", pa.string()),
+            ("tokens_used", pa.int64()),
+            ("role_used", pa.string()),
+            ("created_at", pa.timestamp("us")),
+        ]
+    )
+    count, last_id = 0, None
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        async for batch in iter_batches(session, stmt, batch_size):
+            columns = list(zip(*batch, strict=True))
+            writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+            count += len(batch)
+            last_id = batch[-1][0]
+    return count, last_id
+
+
+def last_exported_id(path: Path) -> int | None:
+    """Read the id of the last record in an existing JSONL export."""
+    if not path.exists() or path.stat().st_size == 0:
+        return None
+
+    with path.open("rb") as f:
+        # Read backwards just far enough to find the last complete line
+        f.seek(0, 2)
+        position = f.tell()
+        chunk = b""
+        while position > 0:
+            step = min(4096, position)
+            position -= step
+            f.seek(position)
+            chunk = f.read(step) + chunk
+            lines = chunk.rstrip(b"\n").split(b"\n")
+            if len(lines) > 1 or position == 0:
+                return int(json.loads(lines[-1])["id"])
+    return None
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        prog="python -m app.export", description="Export conversations to JSONL or Parquet"
+    )
+    parser.add_argument("output", help="Output file path ('-' for stdout, JSONL only)")
+    parser.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl")
+    parser.add_argument("--bot-id", type=int, help="Telegram bot id (multi-bot mode)")
+    parser.add_argument("--user-id", type=int, help="Internal user id")
+    parser.add_argument("--telegram-id", type=int, help="Telegram user id")
+    parser.add_argument("--model", help="Only conversations with this model")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Created at or after")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="Created before")
+    parser.add_argument("--after-id", type=int, help="Only conversations with a greater id")
+    parser.add_argument(
+        "--resume", action="store_true", help="Append to JSONL output after its last exported id"
+    )
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows per fetch")
+    return parser.parse_args(argv)
+
+
+async def run(args: argparse.Namespace, session: AsyncSession) -> tuple[int, int | None]:
+    """Run export described by parsed arguments."""
+    to_stdout = args.output == "-"
+    path = Path(args.output)
+    after_id = args.after_id
+
+    if args.resume:
+        if args.format != "jsonl" or to_stdout:
+            raise ValueError("--resume is only supported for JSONL file output")
+        after_id = last_exported_id(path) or after_id
+        logger.info("Resuming export after id %s", after_id)
+
+    stmt = build_query(
+        bot_id=args.bot_id,
+        user_id=args.user_id,
+        telegram_id=args.telegram_id,
+        model=args.model,
+        since=args.since,
+        until=args.until,
+        after_id=after_id,
+    )
+
+    if args.format == "parquet":
+        if to_stdout:
+            raise ValueError("Parquet export needs a file path")
+        return await export_parquet(session, stmt, path, args.batch_size)
+
+    if to_stdout:
+        return await export_jsonl(session, stmt, sys.stdout, args.batch_size)
+    with path.open("a" if args.resume else "w", encoding="utf-8") as output:
+        return await export_jsonl(session, stmt, output, args.batch_size)
+
+
+async def main(argv: Sequence[str] | None = None) -> None:
+    """Export entry point."""
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    args = parse_args(argv)
+    try:
+        async with AsyncSessionLocal() as session:
+            count, last_id = await run(args, session)
+        logger.info("Exported %s conversations, last id: %s", count, last_id)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except (ValueError, RuntimeError) as e:
+        logging.error("Export failed: %s", e)
+        exit(1)
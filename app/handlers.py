@@ -2,23 +2,41 @@
 All bot handlers in one file.
 """
 
+import asyncio
+import html
 import logging
 
-from aiogram import F, Router, types
+from aiogram import Bot, F, Router, types
 from aiogram.enums import ParseMode
 from aiogram.filters import Command
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
-from app.database import Conversation, User, get_or_create_user_role
+from app.database import (
+    User,
+    get_or_create_user_role,
+    save_conversation,
+    select_user_by_telegram_id,
+)
+from app.logging_setup import SAMPLED
+from app.memory import memory_monitor
+from app.metrics import StageTimer, register_gauge
+from app.services.debounce import MessageDebouncer
+from app.services.history import HistoryCallback, fetch_page, get_full_response
 from app.services.openai_service import OpenAIService
+from app.services.role_registry import role_registry
+from app.services.stats import stats_service
+from app.tenants import tenant_registry
 
 logger = logging.getLogger(__name__)
 
 # Create router
 router = Router()
 
+# Per-chat debouncing of plain text messages (disabled when window is 0)
+debouncer = MessageDebouncer()
+register_gauge("debounce_pending_chats", lambda: debouncer.pending_chats)
+
 
 # Predefined responses for specific queries
 PREDEFINED_RESPONSES = {
@@ -42,6 +60,11 @@ PREDEFINED_RESPONSES = {
 }
 
 
+def is_admin(user: types.User | None) -> bool:
+    """Check whether the Telegram user may run admin commands."""
+    return user is not None and user.id in settings.admin_ids
+
+
 def check_predefined_response(user_message: str) -> str | None:
     """Check if user message matches predefined responses."""
     message_lower = user_message.lower()
@@ -68,28 +91,28 @@ def check_predefined_response(user_message: str) -> str | None:
     return None
 
 
-async def process_ai_message(message: types.Message, session: AsyncSession, text: str) -> None:
-    """Process message through AI service with predefined responses check."""
-    if not message.from_user:
-        await message.reply("Authentication required")
-        return
+async def keep_typing(bot: Bot, chat_id: int, interval: float | None = None) -> None:
+    """Refresh typing indicator until cancelled (Telegram hides it after ~5 s)."""
+    interval = interval or settings.typing_refresh_interval
+    while True:
+        try:
+            await bot.send_chat_action(chat_id=chat_id, action="typing")
+        except Exception as e:
+            logger.debug("Failed to send typing action to %s: %s", chat_id, e)
+        await asyncio.sleep(interval)
 
-    # Check for predefined responses first
-    predefined_response = check_predefined_response(text)
-    if predefined_response:
-        await message.reply(predefined_response, parse_mode=ParseMode.HTML)
-        logger.info(f"Sent predefined response to {message.from_user.id}")
-        return
 
-    # Get or create user
-    telegram_user = message.from_user
-    stmt = select(User).where(User.telegram_id == telegram_user.id)
-    result = await session.execute(stmt)
+async def get_or_create_user(
+    session: AsyncSession, telegram_user: types.User, bot_id: int = 0
+) -> User:
+    """Get user of a bot by Telegram ID or create a new one."""
+    result = await session.execute(select_user_by_telegram_id(telegram_user.id, bot_id))
     user = result.scalar_one_or_none()
 
     if not user:
         # Create new user if not exists
         user = User(
+            bot_id=bot_id,
             telegram_id=telegram_user.id,
             username=telegram_user.username,
             first_name=telegram_user.first_name,
@@ -98,67 +121,116 @@ async def process_ai_message(message: types.Message, session: AsyncSession, text
         )
         session.add(user)
         await session.commit()
-        logger.info(f"Created new user for AI interaction: {user.display_name}")
+        logger.info("Created new user %s for AI interaction", user.id)
 
-    try:
-        # Send typing indicator
-        await message.bot.send_chat_action(chat_id=message.chat.id, action="typing")
+    return user
 
-        # Get user role
-        user_role = await get_or_create_user_role(session, user.id)
 
-        # Initialize OpenAI service
-        openai_service = OpenAIService()
+async def process_ai_message(message: types.Message, session: AsyncSession, text: str) -> None:
+    """Process message through AI service with predefined responses check."""
+    if not message.from_user:
+        await message.reply("Authentication required")
+        return
 
-        # Generate AI response
-        ai_response, tokens = await openai_service.generate_response(
-            user_message=text, role_prompt=user_role.role_prompt, model=settings.default_ai_model
-        )
+    # Check for predefined responses first
+    predefined_response = check_predefined_response(text)
+    if predefined_response:
+        await message.reply(predefined_response, parse_mode=ParseMode.HTML)
+        logger.info("Sent predefined response to %s", message.from_user.id, extra=SAMPLED)
+        return
 
-        # Save conversation to database
-        conversation = Conversation(
-            user_id=user.id,
-            user_message=text,
-            ai_response=ai_response,
-            model_used=settings.default_ai_model,
-            tokens_used=tokens,
-            role_used=user_role.role_name,
-        )
-        session.add(conversation)
-        await session.commit()
+    telegram_user = message.from_user
+    tenant = tenant_registry.get(message.bot)
+    timer = StageTimer()
 
-        # Send AI response to user
-        await message.reply(ai_response, parse_mode=ParseMode.HTML)
+    # Typing indicator runs alongside DB lookups and the OpenAI call
+    typing_task = asyncio.create_task(keep_typing(message.bot, message.chat.id))
 
-        logger.info(f"AI response sent to {user.display_name}, tokens used: {tokens}")
+    try:
+        try:
+            # Get or create user and role
+            with timer.stage("db_lookup"):
+                user = await get_or_create_user(session, telegram_user, tenant.bot_id)
+                user_role = await get_or_create_user_role(
+                    session, user.id, tenant.default_role_name, tenant.default_role_prompt
+                )
+                role_prompt, role_prompt_tokens = await role_registry.resolve(
+                    session, user_role, settings.default_ai_model
+                )
+
+            # Generate AI response
+            with timer.stage("openai"):
+                openai_service = OpenAIService()
+                ai_response, tokens = await openai_service.generate_response(
+                    user_message=text,
+                    role_prompt=role_prompt,
+                    model=settings.default_ai_model,
+                    role_name=user_role.role_name,
+                    role_prompt_tokens=role_prompt_tokens,
+                    bot_id=tenant.bot_id,
+                )
+        finally:
+            typing_task.cancel()
+
+        # Send AI response to user before persisting it
+        with timer.stage("reply"):
+            await message.reply(ai_response, parse_mode=ParseMode.HTML)
 
     except ValueError as e:
         # User-friendly error (from our service)
         await message.reply(f"❌ {str(e)}")
-        logger.warning(f"AI service error for {telegram_user.id}: {e}")
+        logger.warning("AI service error for %s: %s", telegram_user.id, e)
+        return
 
     except Exception as e:
         # Unexpected error
         await message.reply(
             "❌ Sorry, I'm having trouble processing your request. Please try again later."
         )
-        logger.error(f"Unexpected error in AI handler: {e}")
+        logger.error("Unexpected error in AI handler: %s", e)
+        return
+
+    # Save conversation to database; the user already has the answer, so failures are only logged
+    try:
+        with timer.stage("persist"):
+            await save_conversation(
+                session,
+                user_id=user.id,
+                user_message=text,
+                ai_response=ai_response,
+                model_used=settings.default_ai_model,
+                tokens_used=tokens,
+                role_used=user_role.role_name,
+            )
+    except Exception as e:
+        logger.error("Failed to save conversation for user %s: %s", user.id, e)
+        # Leave the session usable, or DatabaseMiddleware's commit fails and the update is retried
+        await session.rollback()
+        return
+
+    logger.info(
+        "AI response sent to user %s, tokens used: %s, %s",
+        user.id,
+        tokens,
+        timer.summary(),
+        extra=SAMPLED,
+    )
 
 
 @router.message(Command("start"))
 async def start_handler(message: types.Message, session: AsyncSession) -> None:
     """Handle /start command."""
+    tenant = tenant_registry.get(message.bot)
     if not message.from_user:
         await message.answer(
-            f"Hello! Welcome to {settings.project_name}, <b>Unknown</b>", parse_mode=ParseMode.HTML
+            f"Hello! Welcome to {tenant.project_name}, <b>Unknown</b>", parse_mode=ParseMode.HTML
         )
         return
 
     telegram_user = message.from_user
 
     # Get or create user
-    stmt = select(User).where(User.telegram_id == telegram_user.id)
-    result = await session.execute(stmt)
+    result = await session.execute(select_user_by_telegram_id(telegram_user.id, tenant.bot_id))
     user = result.scalar_one_or_none()
 
     if user:
@@ -167,10 +239,11 @@ async def start_handler(message: types.Message, session: AsyncSession) -> None:
         user.first_name = telegram_user.first_name
         user.last_name = telegram_user.last_name
         user.language_code = telegram_user.language_code
-        logger.info(f"Updated user: {user.display_name}")
+        logger.info("Updated user %s", user.id)
     else:
         # Create new user
         user = User(
+            bot_id=tenant.bot_id,
             telegram_id=telegram_user.id,
             username=telegram_user.username,
             first_name=telegram_user.first_name,
@@ -178,13 +251,13 @@ async def start_handler(message: types.Message, session: AsyncSession) -> None:
             language_code=telegram_user.language_code,
         )
         session.add(user)
-        logger.info(f"Created new user: {user.display_name}")
+        logger.info("Created new user for %s", telegram_user.id)
 
     await session.commit()
 
     # Send enhanced greeting with bot info
     greeting = (
-        f"Hello! Welcome to {settings.project_name}, 😎 <b>{user.display_name}</b>\n\n"
+        f"Hello! Welcome to {tenant.project_name}, 😎 <b>{user.display_name}</b>\n\n"
         f"🤖 <b>What I can do:</b>\n"
         f"• Answer questions and have conversations\n"
         f"• Help with various tasks using AI\n"
@@ -192,6 +265,7 @@ async def start_handler(message: types.Message, session: AsyncSession) -> None:
         f"📋 <b>Commands:</b>\n"
         f"• /start - Show this welcome message\n"
         f"• /do &lt;message&gt; - Chat with AI (optional)\n"
+        f"• /history - Browse your past conversations\n"
         f"• Just type any message - I'll respond with AI\n\n"
         f"🔗 <b>Source code:</b> https://github.com/ivan-hilckov/hello-ai-bot\n"
         f"💡 Built with aiogram 3.0 + OpenAI API"
@@ -216,16 +290,129 @@ async def do_ai_handler(message: types.Message, session: AsyncSession) -> None:
     await process_ai_message(message, session, text)
 
 
+@router.message(Command("history"))
+async def history_handler(message: types.Message, session: AsyncSession) -> None:
+    """Show the newest page of the user's conversations."""
+    if not message.from_user:
+        return
+
+    bot_id = tenant_registry.get(message.bot).bot_id
+    result = await session.execute(select_user_by_telegram_id(message.from_user.id, bot_id))
+    user = result.scalar_one_or_none()
+    page = await fetch_page(session, user.id) if user else None
+    if page is None or not page.entries:
+        await message.answer("📭 No conversations yet. Send me a message to start one!")
+        return
+
+    await message.answer(page.format(), parse_mode=ParseMode.HTML, reply_markup=page.keyboard())
+
+
+@router.callback_query(HistoryCallback.filter())
+async def history_callback_handler(
+    callback: types.CallbackQuery, callback_data: HistoryCallback, session: AsyncSession
+) -> None:
+    """Page through history or open a full response."""
+    bot_id = tenant_registry.get(callback.bot).bot_id
+    result = await session.execute(select_user_by_telegram_id(callback.from_user.id, bot_id))
+    user = result.scalar_one_or_none()
+    if user is None or callback.message is None:
+        await callback.answer("Conversation not found")
+        return
+
+    if callback_data.action == "show":
+        conversation = await get_full_response(session, user.id, callback_data.id)
+        if conversation is None:
+            await callback.answer("Conversation not found")
+            return
+        await callback.message.answer(conversation.ai_response, parse_mode=ParseMode.HTML)
+        await callback.answer()
+        return
+
+    page = await fetch_page(
+        session,
+        user.id,
+        cursor=(callback_data.ts, callback_data.id),
+        newer=callback_data.action == "newer",
+    )
+    if not page.entries:
+        await callback.answer("No more conversations")
+        return
+
+    await callback.message.edit_text(
+        page.format(), parse_mode=ParseMode.HTML, reply_markup=page.keyboard()
+    )
+    await callback.answer()
+
+
+@router.message(Command("stats"))
+async def stats_handler(message: types.Message) -> None:
+    """Admin-only usage statistics served from the cached snapshot."""
+    if not is_admin(message.from_user):
+        return
+
+    snapshot = await stats_service.get_snapshot()
+    if snapshot is None:
+        await message.answer("📊 Statistics are unavailable right now, try again later.")
+        return
+
+    await message.answer(snapshot.format(), parse_mode=ParseMode.HTML)
+
+
+@router.message(Command("memory"))
+async def memory_handler(message: types.Message) -> None:
+    """
+    Admin-only memory report.
+
+    `/memory snapshot` diffs tracemalloc against the baseline (starting it on
+    first use), `/memory reset` retakes the baseline and `/memory stop` turns
+    tracemalloc off again.
+    """
+    if not is_admin(message.from_user):
+        return
+
+    stats = memory_monitor.check()
+    lines = [f"🧠 <b>Memory</b>\n<code>{html.escape(stats.format())}</code>"]
+
+    args = (message.text or "").split()[1:]
+    if args and args[0] == "snapshot":
+        sites = memory_monitor.snapshot_diff()
+        if sites:
+            lines.append("<b>Top allocation growth:</b>")
+            lines.append("<code>" + html.escape("\n".join(sites)) + "</code>")
+        else:
+            lines.append("Tracemalloc baseline captured, run /memory snapshot again to diff.")
+    elif args and args[0] == "reset":
+        memory_monitor.reset_baseline()
+        lines.append("Tracemalloc baseline reset.")
+    elif args and args[0] == "stop":
+        memory_monitor.stop_tracing()
+        lines.append("Tracemalloc stopped.")
+
+    await message.answer("\n".join(lines), parse_mode=ParseMode.HTML)
+
+
 @router.message(F.text)
 async def default_handler(message: types.Message, session: AsyncSession) -> None:
     """Handle all other text messages through AI service."""
     if not message.text:
         return
 
+    text = message.text
+    if debouncer.enabled:
+        # Merge quick follow-up messages into the first one's request
+        collected = await debouncer.collect(message)
+        if collected is None:
+            return
+        message, text = collected
+
     # Process any text message through AI
-    await process_ai_message(message, session, message.text)
+    await process_ai_message(message, session, text)
 
     if message.from_user:
+        # Ids and lengths only: names and message text stay out of the logs
         logger.info(
-            f"Processed text message from {message.from_user.username or message.from_user.first_name}: {message.text[:50]}..."
+            "Processed text message from %s (%s chars)",
+            message.from_user.id,
+            len(text),
+            extra=SAMPLED,
         )
@@ -0,0 +1,185 @@
+"""
+Liveness and readiness probes.
+
+A background task probes the database and the Bot API on an interval and
+keeps the latest results in memory; /health and /ready only serve that
+report, so container healthchecks never hit Postgres or Telegram directly.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import Any
+
+from aiogram import Bot
+from fastapi import APIRouter, FastAPI
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import __version__
+from app.config import settings
+from app.memory import get_cgroup_limit_bytes, get_rss_bytes
+from app.shutdown import ShutdownCoordinator
+
+logger = logging.getLogger(__name__)
+
+HEALTHY = "healthy"
+UNHEALTHY = "unhealthy"
+
+# Checks that must pass before the bot is ready to receive updates
+READINESS_CHECKS = ("database", "bot_api")
+
+
+@dataclass
+class HealthReport:
+    """Results of one probe round."""
+
+    checks: dict[str, str] = field(default_factory=dict)
+    response_time_ms: int = 0
+    timestamp: datetime = field(default_factory=lambda: datetime.now(UTC))
+
+    @property
+    def ready(self) -> bool:
+        """Whether all readiness checks passed."""
+        return all(self.checks.get(name) == HEALTHY for name in READINESS_CHECKS)
+
+
+class HealthProbe:
+    """Periodically probe dependencies and keep the latest report in memory."""
+
+    def __init__(self, interval: float | None = None, timeout: float | None = None) -> None:
+        """Initialize probe with interval and timeout from settings by default."""
+        self.interval = interval if interval is not None else settings.health_check_interval
+        self.timeout = timeout if timeout is not None else settings.health_check_timeout
+        self.session_factory: async_sessionmaker[AsyncSession] | None = None
+        self.bots: list[Bot] = []
+        self.report: HealthReport | None = None
+        self._updated_at: float | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    async def check_database(self) -> None:
+        """Run a trivial query."""
+        if self.session_factory is None:
+            raise RuntimeError("No database configured")
+        async with self.session_factory() as session:
+            await session.execute(text("SELECT 1"))
+
+    async def check_bot_api(self) -> None:
+        """Call getMe on the Bot API for every bot."""
+        if not self.bots:
+            raise RuntimeError("No bot configured")
+        await asyncio.gather(*(bot.get_me() for bot in self.bots))
+
+    def check_memory(self) -> str:
+        """Compare RSS with the container limit (no I/O beyond /proc and cgroup files)."""
+        limit = get_cgroup_limit_bytes()
+        if limit and get_rss_bytes() >= limit * settings.memory_warn_fraction:
+            return "warning"
+        return HEALTHY
+
+    async def _run_check(self, name: str, check: Any) -> str:
+        try:
+            await asyncio.wait_for(check(), self.timeout)
+        except Exception as e:
+            logger.warning("Health check %s failed: %r", name, e)
+            return UNHEALTHY
+        return HEALTHY
+
+    async def refresh(self) -> HealthReport:
+        """Probe all dependencies concurrently and store the report."""
+        started = time.monotonic()
+        database, bot_api = await asyncio.gather(
+            self._run_check("database", self.check_database),
+            self._run_check("bot_api", self.check_bot_api),
+        )
+        report = HealthReport(
+            checks={"database": database, "bot_api": bot_api, "memory_status": self.check_memory()},
+            response_time_ms=int((time.monotonic() - started) * 1000),
+        )
+        if report.ready and (self.report is None or not self.report.ready):
+            logger.info("Health probe: ready")
+        self.report = report
+        self._updated_at = time.monotonic()
+        return report
+
+    @property
+    def live(self) -> bool:
+        """
+        Whether the process is making progress.
+
+        The report going stale means the event loop (or the probe task) is
+        stuck; dependency failures alone do not make the process unhealthy.
+        """
+        if self._updated_at is None:
+            return self._task is not None and not self._task.done()
+        max_age = 3 * self.interval + self.timeout
+        return time.monotonic() - self._updated_at <= max_age
+
+    def start(self, session_factory: async_sessionmaker[AsyncSession], bots: list[Bot]) -> None:
+        """Start background probing."""
+        self.session_factory = session_factory
+        self.bots = bots
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop background probing."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error("Health probe failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+
+def create_health_router(probe: HealthProbe, coordinator: ShutdownCoordinator) -> APIRouter:
+    """Create /health (liveness) and /ready (readiness) routes served from the probe report."""
+    router = APIRouter()
+
+    def response(ok: bool, status: str) -> JSONResponse:
+        report = probe.report or HealthReport(checks={"database": "unknown", "bot_api": "unknown"})
+        body = {
+            "status": status,
+            "checks": report.checks,
+            "response_time_ms": report.response_time_ms,
+            "timestamp": report.timestamp.isoformat(),
+            "version": __version__,
+            "environment": settings.environment,
+        }
+        return JSONResponse(body, status_code=200 if ok else 503)
+
+    @router.get("/health")
+    async def health() -> JSONResponse:
+        if not probe.live:
+            return response(False, UNHEALTHY)
+        ready = probe.report is not None and probe.report.ready
+        return response(True, HEALTHY if ready else "degraded")
+
+    @router.get("/ready")
+    async def ready() -> JSONResponse:
+        if not coordinator.accepting:
+            return response(False, "shutting_down")
+        ready = probe.report is not None and probe.report.ready
+        return response(ready, HEALTHY if ready else UNHEALTHY)
+
+    return router
+
+
+def create_health_app(probe: HealthProbe, coordinator: ShutdownCoordinator) -> FastAPI:
+    """Create a minimal app exposing only the probes (used in polling mode)."""
+    app = FastAPI(docs_url=None, redoc_url=None, openapi_url=None)
+    app.include_router(create_health_router(probe, coordinator))
+    return app
+
+
+# Global probe instance (started in main)
+health_probe = HealthProbe()
@@ -0,0 +1,160 @@
+"""
+Non-blocking structured logging.
+
+Log calls on the event loop only put records on a bounded in-memory queue;
+a QueueListener thread formats them (JSON by default) and writes to stderr.
+Records carry the id of the update being handled, and high-volume info lines
+can be sampled per update so a sampled update keeps all of its lines.
+"""
+
+import json
+import logging
+import queue
+import sys
+import zlib
+from contextvars import ContextVar
+from datetime import UTC, datetime
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any
+
+from app.config import settings
+from app.metrics import register_gauge
+
+# Id of the update being handled (set by CorrelationMiddleware), "-" outside handlers
+correlation_id: ContextVar[str] = ContextVar("correlation_id", default="-")
+
+# Pass as `extra=SAMPLED` on hot-path info lines that may be sampled
+SAMPLED = {"sampled": True}
+
+# Argument types that are safe to format later on the listener thread
+_IMMUTABLE = (str, int, float, bool, type(None))
+
+# Handler installed by setup_logging(), kept for reporting dropped records
+_queue_handler: "NonBlockingQueueHandler | None" = None
+
+
+class CorrelationFilter(logging.Filter):
+    """Attach the current correlation id to records (runs on the calling thread)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.correlation_id = correlation_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep a fraction of records logged with `extra=SAMPLED`.
+
+    The decision is derived from the correlation id, so either all or none of
+    an update's sampled lines are kept. Warnings and errors are never sampled.
+    """
+
+    def __init__(self, rate: float) -> None:
+        super().__init__()
+        self.threshold = int(max(0.0, min(rate, 1.0)) * 10_000)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.threshold >= 10_000 or record.levelno > logging.INFO:
+            return True
+        if not getattr(record, "sampled", False):
+            return True
+        key = getattr(record, "correlation_id", "-").encode()
+        return zlib.crc32(key) % 10_000 < self.threshold
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that defers formatting to the listener and drops records when full."""
+
+    def __init__(self, log_queue: queue.Queue[logging.LogRecord]) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Make the record safe to hand to another thread without formatting it.
+
+        Mutable arguments (e.g. ORM objects) are converted to strings now;
+        immutable ones are kept so the message is rendered on the listener.
+        """
+        if isinstance(record.args, tuple) and not all(
+            isinstance(arg, _IMMUTABLE) for arg in record.args
+        ):
+            record.args = tuple(
+                arg if isinstance(arg, _IMMUTABLE) else str(arg) for arg in record.args
+            )
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, UTC).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "correlation_id": getattr(record, "correlation_id", "-"),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(correlation_id)s] %(message)s"
+
+
+def setup_logging(
+    level: str | None = None,
+    log_format: str | None = None,
+    sample_rate: float | None = None,
+    queue_size: int | None = None,
+) -> QueueListener:
+    """
+    Route all logging through a queue to a background writer thread.
+
+    Returns:
+        Started listener; call `stop()` on shutdown to flush pending records
+    """
+    level = level or settings.log_level
+    log_format = log_format or settings.log_format
+    sample_rate = sample_rate if sample_rate is not None else settings.log_sample_rate
+    queue_size = queue_size or settings.log_queue_size
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    if log_format == "json":
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    log_queue: queue.Queue[logging.LogRecord] = queue.Queue(maxsize=queue_size)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    # Filters run on the calling thread, where the correlation id is visible
+    queue_handler.addFilter(CorrelationFilter())
+    queue_handler.addFilter(SamplingFilter(sample_rate))
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level.upper())
+
+    global _queue_handler
+    _queue_handler = queue_handler
+    register_gauge("log_queue", log_queue.qsize)
+    register_gauge("log_records_dropped", dropped_records)
+
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+def dropped_records() -> int:
+    """Records dropped because the log queue was full."""
+    return _queue_handler.dropped if _queue_handler is not None else 0
@@ -4,88 +4,249 @@ Simple main application entry point.
 
 import asyncio
 import logging
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager, suppress
 from typing import Any
 
+import uvicorn
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 from aiogram.types import Update
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 
 from app.config import settings
-from app.database import create_tables, engine
-from app.handlers import router
-from app.middleware import DatabaseMiddleware
+from app.database import AsyncSessionLocal, adopt_unscoped_users, create_tables, engine
+from app.handlers import debouncer, router
+from app.health import create_health_app, create_health_router, health_probe
+from app.logging_setup import dropped_records, setup_logging
+from app.memory import memory_monitor
+from app.metrics import register_gauge
+from app.middleware import CorrelationMiddleware, DatabaseMiddleware, DeduplicationMiddleware
+from app.polling import PollingEngine
+from app.services.dedup import UpdateDeduplicator
+from app.services.invalidation import invalidation_bus
+from app.services.openai_service import close_openai_client
+from app.services.role_registry import role_registry
+from app.services.send_scheduler import SendScheduler
+from app.services.stats import stats_service
+from app.shutdown import DrainReport, InFlightMiddleware, ShutdownCoordinator
+from app.tenants import Tenant, tenant_registry
+
+
+class WebhookServer(uvicorn.Server):
+    """Uvicorn server whose signals are handled by the ShutdownCoordinator."""
+
+    @contextmanager
+    def capture_signals(self) -> Iterator[None]:
+        """Leave SIGTERM/SIGINT to the coordinator (uvicorn would re-raise them on exit)."""
+        yield
+
+
+def webhook_path(tenant: Tenant) -> str:
+    """Route receiving a bot's updates (one per bot in multi-bot mode)."""
+    return f"/webhook/{tenant.name}" if settings.bots else "/webhook"
+
+
+def webhook_url(tenant: Tenant) -> str:
+    """Public URL registered with Telegram for a bot (WEBHOOK_URL/<name> in multi-bot mode)."""
+    base = settings.webhook_url or ""
+    return f"{base.rstrip('/')}/{tenant.name}" if settings.bots else base
+
+
+def create_webhook_app(
+    dp: Dispatcher, bots: dict[str, Bot], coordinator: ShutdownCoordinator
+) -> FastAPI:
+    """Create FastAPI app receiving Telegram updates, one route per bot path."""
+    app = FastAPI()
+    app.include_router(create_health_router(health_probe, coordinator))
+
+    def make_endpoint(bot: Bot) -> Callable[[dict[str, Any]], Awaitable[dict[str, bool]]]:
+        async def webhook(update: dict[str, Any]) -> dict[str, bool]:
+            if not coordinator.accepting:
+                # Telegram will redeliver the update to the next instance
+                raise HTTPException(status_code=503, detail="Shutting down")
+
+            telegram_update = Update(**update)
+            task = asyncio.create_task(dp.feed_update(bot, telegram_update))
+            coordinator.track(task)
+            # Shield so uvicorn's shutdown cannot cancel the handler before the drain does
+            await asyncio.shield(task)
+            return {"ok": True}
+
+        return webhook
+
+    for path, bot in bots.items():
+        app.add_api_route(path, make_endpoint(bot), methods=["POST"])
+
+    return app
 
 
 async def main() -> None:
     """Main application function."""
-    logging.basicConfig(level=logging.INFO)
     logger = logging.getLogger(__name__)
 
+    coordinator = ShutdownCoordinator()
+    coordinator.install_signal_handlers()
+
     # Create database tables
     await create_tables()
+    invalidation_bus.start()
+    tenants = tenant_registry.tenants
+    async with AsyncSessionLocal() as session:
+        adopted = await adopt_unscoped_users(session, tenant_registry.primary.bot_id)
+        if adopted:
+            logger.info(
+                "Assigned %s existing users to bot %s", adopted, tenant_registry.primary.name
+            )
+        await role_registry.load(session)
     logger.info("Database initialized")
 
-    # Create bot and dispatcher
-    logger.info("Bot token: %s", settings.bot_token)
-
-    bot = Bot(
-        token=settings.bot_token,
-        default=DefaultBotProperties(parse_mode=ParseMode.HTML),
-    )
+    # Create bots (one per tenant); they share the dispatcher, DB engine and OpenAI client
+    bots: dict[str, Bot] = {}
+    send_schedulers: list[SendScheduler] = []
+    for tenant in tenants:
+        bot = Bot(
+            token=tenant.token,
+            default=DefaultBotProperties(parse_mode=ParseMode.HTML),
+        )
+        # Throttle all outgoing requests to stay within Telegram flood limits (per bot)
+        send_scheduler = SendScheduler()
+        bot.session.middleware(send_scheduler)
+        send_schedulers.append(send_scheduler)
+        bots[tenant.name] = bot
+    logger.info("Serving %s bot(s): %s", len(bots), ", ".join(bots))
     dp = Dispatcher()
 
     # Add middleware and router
+    dp.update.outer_middleware(CorrelationMiddleware())
+    dp.update.outer_middleware(InFlightMiddleware(coordinator))
+    deduplicator = UpdateDeduplicator(
+        session_factory=AsyncSessionLocal if settings.dedup_use_database else None
+    )
+    dp.update.outer_middleware(DeduplicationMiddleware(deduplicator))
+
+    # Size gauges for in-process queues and caches (reported by the memory monitor)
+    register_gauge("in_flight_updates", lambda: coordinator.in_flight)
+    register_gauge("dedup_seen_updates", lambda: len(deduplicator))
+    register_gauge("send_chat_buckets", lambda: sum(s.tracked_chats for s in send_schedulers))
+    register_gauge(
+        "send_chat_actions", lambda: sum(s.tracked_chat_actions for s in send_schedulers)
+    )
+    register_gauge("role_presets", lambda: len(role_registry))
+    register_gauge("db_pool_checked_out", lambda: engine.pool.checkedout())
+    memory_monitor.start()
+    if settings.admin_ids:
+        # /stats is admin-only; aggregates are computed on first use, not on a timer
+        stats_service.start(AsyncSessionLocal)
+    health_probe.start(AsyncSessionLocal, list(bots.values()))
     dp.message.middleware(DatabaseMiddleware())
+    dp.callback_query.middleware(DatabaseMiddleware())
     dp.include_router(router)
+    # Close open debounce windows at shutdown so held messages are answered, not cancelled
+    coordinator.add_flush_hook(debouncer.flush)
+    drain_report = DrainReport()
 
     try:
         if settings.webhook_url:
             # Simple webhook mode
-            logger.info(f"Starting webhook mode: {settings.webhook_url}")
-
-            # Create simple FastAPI app
-            app = FastAPI()
-
-            @app.post("/webhook")
-            async def webhook(update: dict[str, Any]):
-                telegram_update = Update(**update)
-                await dp.feed_update(bot, telegram_update)
-                return {"ok": True}
+            logger.info("Starting webhook mode: %s", settings.webhook_url)
+            app = create_webhook_app(
+                dp, {webhook_path(tenant): bots[tenant.name] for tenant in tenants}, coordinator
+            )
 
-            # Set webhook
-            await bot.set_webhook(url=settings.webhook_url)
-
-            # Run with uvicorn server properly
-            import uvicorn
+            # Set webhooks
+            for tenant in tenants:
+                await bots[tenant.name].set_webhook(url=webhook_url(tenant))
 
             config = uvicorn.Config(
-                app, host="0.0.0.0", port=settings.server_port, log_level="info"
-            )  # nosec B104
-            server = uvicorn.Server(config)
-            await server.serve()
+                app,
+                host="0.0.0.0",  # nosec B104
+                port=settings.server_port,
+                log_level="info",
+                log_config=None,  # Propagate to the queued root handler
+                # Our drain cancels stragglers; uvicorn only needs to outlive it
+                timeout_graceful_shutdown=int(coordinator.grace_period) + 5,
+            )
+            server = WebhookServer(config)
+            server_task = asyncio.create_task(server.serve())
+            try:
+                await coordinator.wait(server_task)
+            finally:
+                # Stop accepting connections, then drain handlers already running
+                server.should_exit = True
+                drain_report = await coordinator.drain()
+                await server_task
 
         else:
             # Polling mode (development)
             logger.info("Starting polling mode")
-            await bot.delete_webhook(drop_pending_updates=True)
-            await dp.start_polling(bot)
+            # Keep pending updates: ones left unhandled by the previous run are delivered again
+            for bot in bots.values():
+                await bot.delete_webhook()
+
+            # Serve /health and /ready so polling containers are probed the same way
+            health_config = uvicorn.Config(
+                create_health_app(health_probe, coordinator),
+                host="0.0.0.0",  # nosec B104
+                port=settings.server_port,
+                log_level="warning",
+                log_config=None,
+                access_log=False,
+            )
+            health_server = WebhookServer(health_config)
+            health_task = asyncio.create_task(health_server.serve())
+
+            polling = PollingEngine(dp)
+            register_gauge("polling_backlog", lambda: polling.backlog)
+            register_gauge("polling_active_handlers", lambda: polling.active)
+            register_gauge("polling_fetch_avg_ms", lambda: polling.fetch_stats.avg_ms)
+            polling_task = asyncio.create_task(polling.run(*bots.values()))
+            try:
+                await coordinator.wait(polling_task)
+            finally:
+                health_server.should_exit = True
+                # Stop fetching, then drain handlers already running
+                polling_task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await polling_task
+                drain_report = await coordinator.drain()
+                # Acknowledge dispatched updates; undispatched ones stay pending for the next run
+                await polling.confirm(*bots.values())
+                await health_task
 
     except Exception as e:
-        logger.error(f"Bot failed: {e}")
+        logger.error("Bot failed: %s", e)
         raise
     finally:
-        await bot.session.close()
+        await health_probe.stop()
+        await memory_monitor.stop()
+        await stats_service.stop()
+        await invalidation_bus.stop()
+        for bot in bots.values():
+            await bot.session.close()
+        await close_openai_client()
         await engine.dispose()
-        logger.info("Bot stopped")
+        logger.info(
+            "Bot stopped, duplicate updates skipped: %s, handlers cancelled on shutdown: %s",
+            deduplicator.duplicates,
+            drain_report.cancelled,
+        )
 
 
 if __name__ == "__main__":
+    log_listener = setup_logging()
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
         logging.info("Bot stopped by user")
     except Exception as e:
-        logging.error(f"Application failed: {e}")
+        logging.error("Application failed: %s", e)
         exit(1)
+    finally:
+        if dropped_records():
+            logging.warning(
+                "Dropped %s log records while the log queue was full", dropped_records()
+            )
+        # Flush queued records before the interpreter exits
+        log_listener.stop()
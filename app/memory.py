@@ -0,0 +1,201 @@
+"""
+Memory observability for the 128 MB container limit.
+
+Periodically logs RSS, GC stats and subsystem gauges, warns when RSS
+approaches the cgroup limit and produces tracemalloc diffs on demand.
+"""
+
+import asyncio
+import gc
+import logging
+import os
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+
+from app.config import settings
+from app.metrics import read_gauges
+
+try:
+    import psutil
+except ImportError:  # psutil is an optional production dependency
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+CGROUP_LIMIT_FILES = (
+    Path("/sys/fs/cgroup/memory.max"),  # cgroup v2
+    Path("/sys/fs/cgroup/memory/memory.limit_in_bytes"),  # cgroup v1
+)
+
+# Values above this are cgroup v1's way of saying "no limit"
+_UNLIMITED = 1 << 60
+
+
+@dataclass
+class MemoryStats:
+    """Point-in-time memory usage of the process."""
+
+    rss_bytes: int
+    limit_bytes: int | None
+    gc_counts: tuple[int, int, int]
+    gc_collections: tuple[int, ...]
+    gc_uncollectable: int
+    gauges: dict[str, int]
+
+    @property
+    def limit_fraction(self) -> float | None:
+        """RSS as a fraction of the cgroup limit, if there is one."""
+        if not self.limit_bytes:
+            return None
+        return self.rss_bytes / self.limit_bytes
+
+    def format(self) -> str:
+        """Human readable one-line summary."""
+        line = f"rss={self.rss_bytes / 2**20:.1f}MB"
+        if self.limit_bytes:
+            line += f" limit={self.limit_bytes / 2**20:.0f}MB ({self.limit_fraction:.0%})"
+        line += (
+            f" gc_counts={self.gc_counts} gc_collections={self.gc_collections}"
+            f" gc_uncollectable={self.gc_uncollectable}"
+        )
+        if self.gauges:
+            line += " " + " ".join(f"{name}={value}" for name, value in self.gauges.items())
+        return line
+
+
+def get_rss_bytes() -> int:
+    """Current resident set size of this process."""
+    if psutil is not None:
+        return int(psutil.Process().memory_info().rss)
+
+    try:
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    # Peak RSS as last resort (kilobytes on Linux)
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def get_cgroup_limit_bytes() -> int | None:
+    """Container memory limit, or None when unlimited or unknown."""
+    for path in CGROUP_LIMIT_FILES:
+        try:
+            value = path.read_text().strip()
+        except OSError:
+            continue
+        if value == "max":
+            return None
+        limit = int(value)
+        return limit if limit < _UNLIMITED else None
+    return None
+
+
+def collect_memory_stats() -> MemoryStats:
+    """Collect RSS, GC stats and subsystem gauges."""
+    # gc.get_stats() is a few counters per generation; gc.get_objects() would
+    # allocate a list of every tracked object, right when memory is tight
+    gc_stats = gc.get_stats()
+    return MemoryStats(
+        rss_bytes=get_rss_bytes(),
+        limit_bytes=get_cgroup_limit_bytes(),
+        gc_counts=gc.get_count(),
+        gc_collections=tuple(generation["collections"] for generation in gc_stats),
+        gc_uncollectable=sum(generation["uncollectable"] for generation in gc_stats),
+        gauges=read_gauges(),
+    )
+
+
+class MemoryMonitor:
+    """Background memory reporter with tracemalloc snapshot diffs."""
+
+    def __init__(
+        self,
+        interval: float | None = None,
+        warn_fraction: float | None = None,
+    ) -> None:
+        """Initialize monitor with interval and warning threshold from settings by default."""
+        self.interval = interval if interval is not None else settings.memory_report_interval
+        self.warn_fraction = (
+            warn_fraction if warn_fraction is not None else settings.memory_warn_fraction
+        )
+        self._baseline: tracemalloc.Snapshot | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        """Start periodic reporting (and tracemalloc if enabled in settings)."""
+        if settings.tracemalloc_enabled:
+            self.reset_baseline()
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop periodic reporting."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def check(self) -> MemoryStats:
+        """Collect stats once, logging them and warning near the container limit."""
+        stats = collect_memory_stats()
+        fraction = stats.limit_fraction
+        if fraction is not None and fraction >= self.warn_fraction:
+            logger.warning("Memory usage near container limit: %s", stats.format())
+        else:
+            logger.info("Memory: %s", stats.format())
+        return stats
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.check()
+            except Exception as e:
+                logger.error("Memory report failed: %s", e)
+
+    def reset_baseline(self) -> None:
+        """Start tracemalloc if needed and take the baseline snapshot."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(settings.tracemalloc_frames)
+        self._baseline = tracemalloc.take_snapshot()
+
+    def stop_tracing(self) -> None:
+        """Stop tracemalloc and drop the baseline, releasing the tracing overhead."""
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._baseline = None
+
+    def snapshot_diff(self, limit: int = 10) -> list[str]:
+        """
+        Diff current allocations against the baseline.
+
+        Returns:
+            Top allocation sites by size growth. Empty if no baseline existed yet;
+            in that case tracing starts now and the next call produces a diff.
+        """
+        if self._baseline is None or not tracemalloc.is_tracing():
+            self.reset_baseline()
+            return []
+
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),)
+        )
+        stats = snapshot.compare_to(self._baseline, "lineno")
+        lines = []
+        for stat in stats[:limit]:
+            frame = stat.traceback[0]
+            lines.append(
+                f"{os.path.relpath(frame.filename)}:{frame.lineno} "
+                f"{stat.size_diff / 1024:+.1f} KiB ({stat.count_diff:+d} blocks)"
+            )
+        return lines
+
+
+# Global monitor instance
+memory_monitor = MemoryMonitor()
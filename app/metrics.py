@@ -0,0 +1,74 @@
+"""
+Lightweight in-process metrics.
+"""
+
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+
+@dataclass
+class StageStats:
+    """Aggregated timings for a single pipeline stage."""
+
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+    @property
+    def avg_ms(self) -> float:
+        """Average stage duration in milliseconds."""
+        return self.total_ms / self.count if self.count else 0.0
+
+    def add(self, elapsed_ms: float) -> None:
+        """Record one stage duration."""
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+
+# Process-wide stage statistics, keyed by stage name
+stage_stats: dict[str, StageStats] = {}
+
+
+class StageTimer:
+    """Collect per-stage timings for one request."""
+
+    def __init__(self) -> None:
+        self.timings: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a block of code as the named stage."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.timings[name] = elapsed_ms
+            stage_stats.setdefault(name, StageStats()).add(elapsed_ms)
+
+    def summary(self) -> str:
+        """Format timings for logging, e.g. ``db=3.1ms openai=812.4ms``."""
+        return " ".join(f"{name}={ms:.1f}ms" for name, ms in self.timings.items())
+
+
+# Size gauges for in-process queues and caches, keyed by subsystem name
+gauges: dict[str, Callable[[], int]] = {}
+
+
+def register_gauge(name: str, read: Callable[[], int]) -> None:
+    """Register a callable reporting the current size of a queue or cache."""
+    gauges[name] = read
+
+
+def read_gauges() -> dict[str, int]:
+    """Read all registered gauges, skipping ones that fail."""
+    values: dict[str, int] = {}
+    for name, read in gauges.items():
+        try:
+            values[name] = int(read())
+        except Exception:  # nosec B112 - a broken gauge must not break reporting
+            continue
+    return values
@@ -6,9 +6,11 @@ from collections.abc import Awaitable, Callable
 from typing import Any
 
 from aiogram import BaseMiddleware
-from aiogram.types import TelegramObject
+from aiogram.types import TelegramObject, Update
 
 from app.database import AsyncSessionLocal
+from app.logging_setup import correlation_id
+from app.services.dedup import UpdateDeduplicator
 
 
 class DatabaseMiddleware(BaseMiddleware):
@@ -30,3 +32,52 @@ class DatabaseMiddleware(BaseMiddleware):
             except Exception:
                 await session.rollback()
                 raise
+
+
+class DeduplicationMiddleware(BaseMiddleware):
+    """Outer update middleware dropping updates that were already delivered."""
+
+    def __init__(self, deduplicator: UpdateDeduplicator) -> None:
+        self.deduplicator = deduplicator
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        """Skip handlers for duplicate update ids."""
+        if not isinstance(event, Update):
+            return await handler(event, data)
+
+        bot_id = getattr(data.get("bot"), "id", 0)
+        if not await self.deduplicator.claim(event.update_id, bot_id):
+            return None
+
+        try:
+            return await handler(event, data)
+        except Exception:
+            # Let Telegram's redelivery retry updates that crashed
+            await self.deduplicator.forget(event.update_id, bot_id)
+            raise
+
+
+class CorrelationMiddleware(BaseMiddleware):
+    """Outer update middleware tagging log records with the update being handled."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        """Set correlation id to <bot id>:<update id> for the duration of the handler."""
+        if not isinstance(event, Update):
+            return await handler(event, data)
+
+        bot_id = getattr(data.get("bot"), "id", 0)
+        token = correlation_id.set(f"{bot_id}:{event.update_id}")
+        try:
+            return await handler(event, data)
+        finally:
+            correlation_id.reset(token)
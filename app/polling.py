@@ -0,0 +1,159 @@
+"""
+Long-polling engine with bounded concurrency.
+
+Each bot has one loop calling getUpdates with a tunable timeout and batch
+limit. Every update runs as its own task, but a semaphore caps how many run
+at once. When all slots are taken, the loop stops fetching, so a burst waits
+on Telegram's side instead of piling up DB sessions and OpenAI calls here.
+
+Telegram only forgets updates once a later getUpdates call confirms them. On
+shutdown `confirm()` acknowledges the updates that were dispatched, so the
+ones still waiting for a slot are delivered again on the next start.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+from aiogram.methods import GetUpdates
+from aiogram.types import Update
+from aiogram.utils.backoff import Backoff, BackoffConfig
+
+from app.config import settings
+from app.metrics import StageStats
+
+logger = logging.getLogger(__name__)
+
+BACKOFF_CONFIG = BackoffConfig(min_delay=1.0, max_delay=5.0, factor=1.3, jitter=0.1)
+
+
+class PollingEngine:
+    """Fetch updates for several bots and feed them to the dispatcher."""
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        max_concurrency: int | None = None,
+        timeout: int | None = None,
+        limit: int | None = None,
+        allowed_updates: list[str] | None = None,
+        backoff_config: BackoffConfig = BACKOFF_CONFIG,
+    ) -> None:
+        """Initialize engine; unset options come from settings."""
+        self.dispatcher = dispatcher
+        self.max_concurrency = max_concurrency or settings.polling_max_concurrency
+        self.timeout = timeout if timeout is not None else settings.polling_timeout
+        self.limit = limit or settings.polling_limit
+        # Only request update types that have handlers
+        self.allowed_updates = (
+            allowed_updates
+            or settings.polling_allowed_updates
+            or dispatcher.resolve_used_update_types()
+        )
+        self.backoff_config = backoff_config
+
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._tasks: set[asyncio.Task[Any]] = set()
+        # Last update id handed to the dispatcher, per bot id
+        self._dispatched: dict[int, int] = {}
+
+        # Metrics
+        self.fetch_stats = StageStats()  # getUpdates time of batches that returned updates
+        self.backlog = 0  # Fetched updates waiting for a free handler slot
+        self.fetch_errors = 0
+
+    @property
+    def active(self) -> int:
+        """Number of update handlers currently running."""
+        return len(self._tasks)
+
+    async def run(self, *bots: Bot) -> None:
+        """Poll all bots until cancelled."""
+        await asyncio.gather(*(self._poll(bot) for bot in bots))
+
+    async def _poll(self, bot: Bot) -> None:
+        """Fetch batches for one bot and dispatch them within the concurrency limit."""
+        backoff = Backoff(config=self.backoff_config)
+        offset: int | None = None
+        request_timeout = int(bot.session.timeout + self.timeout) if bot.session.timeout else None
+        logger.info(
+            "Polling bot %s (timeout %ss, limit %s, max concurrency %s, updates: %s)",
+            bot.id,
+            self.timeout,
+            self.limit,
+            self.max_concurrency,
+            ",".join(self.allowed_updates),
+        )
+
+        while True:
+            method = GetUpdates(
+                offset=offset,
+                limit=self.limit,
+                timeout=self.timeout,
+                allowed_updates=self.allowed_updates,
+            )
+            started = time.perf_counter()
+            try:
+                updates = await bot(method, request_timeout=request_timeout)
+            except Exception as e:
+                self.fetch_errors += 1
+                logger.warning(
+                    "Failed to fetch updates for bot %s, retrying in %.1fs: %s",
+                    bot.id,
+                    backoff.next_delay,
+                    e,
+                )
+                await backoff.asleep()
+                continue
+            backoff.reset()
+
+            if not updates:
+                continue
+            # Empty batches last the whole long-poll timeout and would only measure idleness
+            self.fetch_stats.add((time.perf_counter() - started) * 1000)
+            # Confirmed by the next getUpdates call, after the batch is dispatched
+            offset = updates[-1].update_id + 1
+            await self._dispatch(bot, updates)
+
+    async def _dispatch(self, bot: Bot, updates: list[Update]) -> None:
+        """Start a handler task per update, waiting for a free slot before each one."""
+        pending = len(updates)
+        self.backlog += pending
+        try:
+            for update in updates:
+                await self._semaphore.acquire()
+                self.backlog -= 1
+                pending -= 1
+                task = asyncio.create_task(self._handle(bot, update))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+                self._dispatched[bot.id] = update.update_id
+        finally:
+            self.backlog -= pending
+
+    async def confirm(self, *bots: Bot) -> None:
+        """
+        Acknowledge dispatched updates so Telegram does not deliver them again.
+
+        Call after polling has stopped. Updates fetched but never dispatched
+        stay unconfirmed and are received again on the next start.
+        """
+        for bot in bots:
+            last = self._dispatched.get(bot.id)
+            if last is None:
+                continue
+            try:
+                await bot(GetUpdates(offset=last + 1, limit=1, timeout=0))
+            except Exception as e:
+                logger.warning("Failed to confirm updates up to %s for bot %s: %s", last, bot.id, e)
+
+    async def _handle(self, bot: Bot, update: Update) -> None:
+        """Run the dispatcher for one update and release its slot."""
+        try:
+            await self.dispatcher.feed_update(bot, update)
+        except Exception as e:
+            logger.error("Update %s failed: %s", update.update_id, e)
+        finally:
+            self._semaphore.release()
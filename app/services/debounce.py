@@ -0,0 +1,92 @@
+"""
+Per-sender message debouncing.
+
+Users often split one thought into several quick messages. The first message
+of a sender in a chat opens a window; that sender's messages arriving before
+it closes are merged into it and processed as a single AI request. Each new
+message extends the window, up to a maximum delay. Batches are keyed by chat
+and sender, so in group chats different users' messages are never merged.
+"""
+
+import asyncio
+import time
+from contextlib import suppress
+from dataclasses import dataclass, field
+
+from aiogram import types
+
+from app.config import settings
+
+
+@dataclass
+class _Batch:
+    """Messages collected for one sender in one chat."""
+
+    messages: list[types.Message]
+    started_at: float
+    last_at: float = field(default=0.0)
+    closed: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+class MessageDebouncer:
+    """Coalesce text messages arriving in quick succession per chat and sender."""
+
+    def __init__(self, window_ms: int | None = None, max_delay_ms: int | None = None) -> None:
+        """Initialize debouncer with window sizes from settings by default."""
+        window_ms = window_ms if window_ms is not None else settings.debounce_window_ms
+        max_delay_ms = max_delay_ms if max_delay_ms is not None else settings.debounce_max_delay_ms
+        self.window = window_ms / 1000
+        self.max_delay = max(max_delay_ms, window_ms) / 1000
+        self._batches: dict[tuple[int, int | None], _Batch] = {}
+        self._flushing = False
+
+    @property
+    def enabled(self) -> bool:
+        """Whether debouncing is turned on."""
+        return self.window > 0
+
+    @property
+    def pending_chats(self) -> int:
+        """Number of open windows (one per chat and sender)."""
+        return len(self._batches)
+
+    async def collect(self, message: types.Message) -> tuple[types.Message, str] | None:
+        """
+        Add message to the batch of its chat and sender.
+
+        Returns:
+            (latest message, merged text) for the message that opened the window
+            once it closes, None for messages merged into an open window
+        """
+        now = time.monotonic()
+        key = (message.chat.id, message.from_user.id if message.from_user else None)
+        if self._flushing:
+            return message, message.text or ""
+
+        batch = self._batches.get(key)
+        if batch is not None:
+            batch.messages.append(message)
+            batch.last_at = now
+            return None
+
+        batch = _Batch(messages=[message], started_at=now, last_at=now)
+        self._batches[key] = batch
+        try:
+            while not batch.closed.is_set():
+                deadline = min(batch.last_at + self.window, batch.started_at + self.max_delay)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                with suppress(TimeoutError):
+                    await asyncio.wait_for(batch.closed.wait(), remaining)
+        finally:
+            del self._batches[key]
+
+        text = "\n".join(m.text for m in batch.messages if m.text)
+        return batch.messages[-1], text
+
+    async def flush(self) -> None:
+        """Close all open windows now and stop holding new messages (used on shutdown)."""
+        self._flushing = True
+        for batch in self._batches.values():
+            batch.closed.set()
@@ -0,0 +1,144 @@
+"""
+Telegram update deduplication.
+
+Telegram re-delivers updates when the webhook answers slowly, so each
+update is claimed once before handlers run. Update ids are only unique per
+bot, so claims are keyed by (bot id, update id). Claims are kept in a bounded
+in-memory set with time-based eviction and, optionally, in Postgres so that
+duplicates are caught across replicas and restarts.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Any
+
+from sqlalchemy import ColumnElement, delete, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.database import ProcessedUpdate
+
+logger = logging.getLogger(__name__)
+
+
+def expiry_cutoff(dialect: str, ttl: float) -> ColumnElement[Any]:
+    """
+    Oldest claim time still kept, computed on the database clock.
+
+    created_at is written by the server's now(), so the cutoff must come from
+    the same clock; the container's local time may use another timezone.
+    """
+    if dialect == "sqlite":
+        # SQLite cannot subtract intervals; CURRENT_TIMESTAMP is UTC text
+        return func.datetime("now", f"-{int(ttl)} seconds")
+    return func.now() - timedelta(seconds=ttl)
+
+
+class UpdateDeduplicator:
+    """Claim update ids so each Telegram update is processed only once."""
+
+    def __init__(
+        self,
+        ttl: float | None = None,
+        max_size: int | None = None,
+        session_factory: async_sessionmaker[AsyncSession] | None = None,
+    ) -> None:
+        """
+        Initialize deduplicator.
+
+        Args:
+            ttl: Seconds to remember an update id
+            max_size: Maximum number of remembered ids in memory
+            session_factory: Enables the shared Postgres-backed table when given
+        """
+        self.ttl = ttl if ttl is not None else settings.dedup_ttl_seconds
+        self.max_size = max_size if max_size is not None else settings.dedup_max_size
+        self.session_factory = session_factory
+
+        self._seen: OrderedDict[tuple[int, int], float] = OrderedDict()
+        self._claims_since_cleanup = 0
+
+        # Counter for observability
+        self.duplicates = 0
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def _evict(self, now: float) -> None:
+        """Drop expired ids and keep the set within max_size."""
+        while self._seen:
+            key, seen_at = next(iter(self._seen.items()))
+            if now - seen_at < self.ttl and len(self._seen) <= self.max_size:
+                break
+            del self._seen[key]
+
+    async def claim(self, update_id: int, bot_id: int = 0) -> bool:
+        """
+        Claim update for processing.
+
+        Args:
+            update_id: Telegram update id
+            bot_id: Id of the bot that received the update
+
+        Returns:
+            True if the update is new, False if it was already claimed
+        """
+        now = time.monotonic()
+        self._evict(now)
+
+        key = (bot_id, update_id)
+        if key in self._seen or not await self._claim_in_database(update_id, bot_id):
+            self.duplicates += 1
+            logger.info("Skipping duplicate update %s (total: %s)", update_id, self.duplicates)
+            return False
+
+        self._seen[key] = now
+        return True
+
+    async def forget(self, update_id: int, bot_id: int = 0) -> None:
+        """Release a claim so a redelivered update is processed again (e.g. after a crash)."""
+        self._seen.pop((bot_id, update_id), None)
+        if self.session_factory is None:
+            return
+
+        try:
+            async with self.session_factory() as session:
+                await session.execute(
+                    delete(ProcessedUpdate).where(
+                        ProcessedUpdate.bot_id == bot_id, ProcessedUpdate.update_id == update_id
+                    )
+                )
+                await session.commit()
+        except Exception as e:
+            logger.warning("Failed to release update %s in dedup table: %s", update_id, e)
+
+    async def _claim_in_database(self, update_id: int, bot_id: int) -> bool:
+        """Insert update id into the shared table; a conflict means another replica has it."""
+        if self.session_factory is None:
+            return True
+
+        try:
+            async with self.session_factory() as session:
+                session.add(ProcessedUpdate(bot_id=bot_id, update_id=update_id))
+                try:
+                    await session.commit()
+                except IntegrityError:
+                    await session.rollback()
+                    return False
+
+                self._claims_since_cleanup += 1
+                if self._claims_since_cleanup >= settings.dedup_cleanup_every:
+                    self._claims_since_cleanup = 0
+                    cutoff = expiry_cutoff(session.bind.dialect.name, self.ttl)
+                    await session.execute(
+                        delete(ProcessedUpdate).where(ProcessedUpdate.created_at < cutoff)
+                    )
+                    await session.commit()
+        except Exception as e:
+            # Never drop updates because the dedup table is unavailable
+            logger.warning("Update dedup table unavailable, using memory only: %s", e)
+
+        return True
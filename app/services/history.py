@@ -0,0 +1,176 @@
+"""
+Paging through a user's conversation history.
+
+Pages are fetched with keyset pagination on (created_at, id) over the
+(user_id, created_at, id) index, so every page costs O(page size) no matter
+how deep the user has paged. Pages only carry truncated previews; a full
+response is loaded by id when the user asks for it.
+"""
+
+import html
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import InlineKeyboardMarkup
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import Conversation
+
+# Cursor timestamps travel in callback data as integer microseconds (64-byte limit)
+_EPOCH = datetime(1970, 1, 1)
+
+
+class HistoryCallback(CallbackData, prefix="history"):
+    """Callback data for /history buttons."""
+
+    action: str  # "older", "newer" or "show"
+    ts: int = 0  # Cursor created_at in microseconds since epoch
+    id: int = 0  # Cursor (or shown) conversation id
+
+
+@dataclass(frozen=True)
+class HistoryEntry:
+    """Preview of one conversation."""
+
+    id: int
+    created_at: datetime
+    question: str
+    answer: str
+
+    @property
+    def cursor(self) -> tuple[int, int]:
+        """Position of this entry as (microseconds since epoch, id)."""
+        return encode_timestamp(self.created_at), self.id
+
+
+@dataclass
+class HistoryPage:
+    """Page of entries, newest first."""
+
+    entries: list[HistoryEntry]
+    has_older: bool
+    has_newer: bool
+
+    def format(self) -> str:
+        """Format page as an HTML message."""
+        lines = ["📜 <b>Your conversations</b>"]
+        for number, entry in enumerate(self.entries, start=1):
+            lines.append(f"\n<b>{number}.</b> <i>{entry.created_at:%Y-%m-%d %H:%M}</i>")
+            lines.append(f"❓ {html.escape(entry.question)}")
+            lines.append(f"💬 {html.escape(entry.answer)}")
+        return "\n".join(lines)
+
+    def keyboard(self) -> InlineKeyboardMarkup:
+        """Buttons to open full responses and to page from the first/last entry."""
+        builder = InlineKeyboardBuilder()
+        for number, entry in enumerate(self.entries, start=1):
+            builder.button(
+                text=f"📄 {number}", callback_data=HistoryCallback(action="show", id=entry.id)
+            )
+
+        navigation = []
+        if self.has_newer:
+            ts, id_ = self.entries[0].cursor
+            navigation.append(("⬅️ Newer", HistoryCallback(action="newer", ts=ts, id=id_)))
+        if self.has_older:
+            ts, id_ = self.entries[-1].cursor
+            navigation.append(("Older ➡️", HistoryCallback(action="older", ts=ts, id=id_)))
+        for text, callback_data in navigation:
+            builder.button(text=text, callback_data=callback_data)
+
+        builder.adjust(len(self.entries), *([len(navigation)] if navigation else []))
+        return builder.as_markup()
+
+
+def encode_timestamp(value: datetime) -> int:
+    """Encode a (naive UTC) timestamp as microseconds since epoch."""
+    return (value.replace(tzinfo=None) - _EPOCH) // timedelta(microseconds=1)
+
+
+def decode_timestamp(value: int) -> datetime:
+    """Decode microseconds since epoch back to a naive UTC timestamp."""
+    return _EPOCH + timedelta(microseconds=value)
+
+
+def _preview(text: str, limit: int) -> str:
+    """Shorten text to `limit` characters (the query fetches one extra to detect cut-offs)."""
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 1].rstrip() + "…"
+
+
+async def fetch_page(
+    session: AsyncSession,
+    user_id: int,
+    cursor: tuple[int, int] | None = None,
+    newer: bool = False,
+    page_size: int | None = None,
+) -> HistoryPage:
+    """
+    Fetch one page of a user's conversations.
+
+    Args:
+        session: Database session
+        user_id: Internal user id
+        cursor: (timestamp, id) of the entry to page from; None for the newest page
+        newer: Page towards newer entries from the cursor instead of older ones
+        page_size: Entries per page (settings.history_page_size by default)
+
+    Returns:
+        Page with entries ordered newest first
+    """
+    page_size = page_size or settings.history_page_size
+    limit = settings.history_preview_chars
+    position = tuple_(Conversation.created_at, Conversation.id)
+
+    stmt = select(
+        Conversation.id,
+        Conversation.created_at,
+        func.substr(Conversation.user_message, 1, limit + 1),
+        func.substr(Conversation.ai_response, 1, limit + 1),
+    ).where(Conversation.user_id == user_id)
+
+    if cursor is not None:
+        key = tuple_(decode_timestamp(cursor[0]), cursor[1])
+        stmt = stmt.where(position > key if newer else position < key)
+    if newer:
+        stmt = stmt.order_by(Conversation.created_at.asc(), Conversation.id.asc())
+    else:
+        stmt = stmt.order_by(Conversation.created_at.desc(), Conversation.id.desc())
+
+    # One extra row tells whether there is another page in this direction
+    rows = (await session.execute(stmt.limit(page_size + 1))).all()
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if newer:
+        rows.reverse()
+
+    entries = [
+        HistoryEntry(
+            id=row[0],
+            created_at=row[1],
+            question=_preview(row[2], limit),
+            answer=_preview(row[3], limit),
+        )
+        for row in rows
+    ]
+    # We arrived from the other direction, so entries exist on that side
+    came_from_other_side = cursor is not None
+    return HistoryPage(
+        entries=entries,
+        has_older=came_from_other_side if newer else has_more,
+        has_newer=has_more if newer else came_from_other_side,
+    )
+
+
+async def get_full_response(
+    session: AsyncSession, user_id: int, conversation_id: int
+) -> Conversation | None:
+    """Load one conversation of the user by id."""
+    stmt = select(Conversation).where(
+        Conversation.id == conversation_id, Conversation.user_id == user_id
+    )
+    return (await session.execute(stmt)).scalar_one_or_none()
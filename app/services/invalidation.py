@@ -0,0 +1,184 @@
+"""
+Cross-replica cache invalidation over PostgreSQL LISTEN/NOTIFY.
+
+Several bot processes share one database, so in-process caches (role presets,
+etc.) must be evicted when another replica changes the underlying rows.
+Publishers call `publish()` after their transaction commits; every replica
+holds a dedicated asyncpg connection LISTENing on one channel and evicts the
+matching local entries. After a connection gap all subscribers are flushed,
+since notifications sent meanwhile are lost.
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import asyncpg
+from sqlalchemy.engine import make_url
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Subscriber callback: receives the invalidated key, or None to flush everything
+InvalidationCallback = Callable[[str | None], None]
+Connect = Callable[[str], Awaitable[Any]]
+
+
+def asyncpg_dsn(database_url: str) -> str:
+    """Convert SQLAlchemy URL (postgresql+asyncpg://) to a plain asyncpg DSN."""
+    return make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+class InvalidationBus:
+    """Publish and receive keyed cache invalidations between replicas."""
+
+    def __init__(
+        self,
+        dsn: str | None = None,
+        channel: str | None = None,
+        connect: Connect | None = None,
+        keepalive: float | None = None,
+        reconnect_delay: float = 1.0,
+        enabled: bool | None = None,
+    ) -> None:
+        """Initialize bus; `connect` can be replaced with a stand-in for tests."""
+        self.enabled = enabled if enabled is not None else settings.invalidation_enabled
+        self.dsn = dsn or asyncpg_dsn(settings.database_url)
+        self.channel = channel or settings.invalidation_channel
+        self.keepalive = keepalive if keepalive is not None else settings.invalidation_keepalive
+        self.reconnect_delay = reconnect_delay
+        self._connect = connect or asyncpg.connect
+
+        self.origin = uuid.uuid4().hex[:12]
+        self._subscribers: dict[str, list[InvalidationCallback]] = {}
+        self._connection: Any = None
+        self._connected = asyncio.Event()
+        self._connection_lock = asyncio.Lock()  # asyncpg runs one query at a time
+        self._task: asyncio.Task[None] | None = None
+
+        # Counters for observability
+        self.received = 0
+        self.reconnects = 0
+
+    def subscribe(self, namespace: str, callback: InvalidationCallback) -> None:
+        """Call `callback` when keys in `namespace` are invalidated."""
+        self._subscribers.setdefault(namespace, []).append(callback)
+
+    def start(self) -> None:
+        """Start the listener task (no-op when disabled)."""
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the listener and close its connection."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def wait_connected(self, timeout: float | None = None) -> None:
+        """Wait until the listener is connected."""
+        await asyncio.wait_for(self._connected.wait(), timeout)
+
+    async def publish(self, namespace: str, key: str | None = None) -> None:
+        """
+        Invalidate `key` in `namespace` (all keys when None) on every replica.
+
+        Call after the transaction changing the data has committed. Local
+        subscribers are invoked immediately; delivery to others is best effort,
+        and missed messages are covered by the flush after reconnect.
+        """
+        self._dispatch(namespace, key)
+        if not self.enabled:
+            return
+
+        payload = json.dumps({"o": self.origin, "n": namespace, "k": key})
+        try:
+            if self._connection is not None and not self._connection.is_closed():
+                async with self._connection_lock:
+                    await self._connection.execute(
+                        "SELECT pg_notify($1, $2)", self.channel, payload
+                    )
+                return
+
+            connection = await self._connect(self.dsn)
+            try:
+                await connection.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+            finally:
+                await connection.close()
+        except Exception as e:
+            logger.warning("Failed to publish invalidation %s:%s: %s", namespace, key, e)
+
+    def _dispatch(self, namespace: str, key: str | None) -> None:
+        for callback in self._subscribers.get(namespace, []):
+            try:
+                callback(key)
+            except Exception as e:
+                logger.error("Invalidation subscriber for %s failed: %s", namespace, e)
+
+    def flush_all(self) -> None:
+        """Evict everything in every subscribed namespace."""
+        for namespace in self._subscribers:
+            self._dispatch(namespace, None)
+
+    def _on_notification(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logger.warning("Ignoring malformed invalidation payload: %r", payload)
+            return
+
+        if message.get("o") == self.origin:
+            return  # Already applied locally in publish()
+        self.received += 1
+        self._dispatch(message.get("n", ""), message.get("k"))
+
+    async def _run(self) -> None:
+        """Listen forever, reconnecting and flushing local caches after every gap."""
+        connected_before = False
+        while True:
+            closed = asyncio.Event()
+            try:
+                connection = self._connection = await self._connect(self.dsn)
+                connection.add_termination_listener(lambda _conn, event=closed: event.set())
+                await connection.add_listener(self.channel, self._on_notification)
+
+                if connected_before:
+                    # Notifications sent while we were away are lost
+                    self.reconnects += 1
+                    logger.info("Invalidation listener reconnected, flushing local caches")
+                    self.flush_all()
+                connected_before = True
+                self._connected.set()
+
+                while not closed.is_set():
+                    try:
+                        await asyncio.wait_for(closed.wait(), timeout=self.keepalive)
+                    except TimeoutError:
+                        # Detect silently dropped connections; a hung one times out
+                        async with self._connection_lock:
+                            await connection.execute("SELECT 1", timeout=self.keepalive)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Invalidation listener connection lost: %s", e)
+            finally:
+                self._connected.clear()
+                connection, self._connection = self._connection, None
+                if connection is not None and not connection.is_closed():
+                    try:
+                        # Terminates the connection if it does not close in time
+                        await connection.close(timeout=self.keepalive)
+                    except Exception:  # nosec B110 - connection is already broken
+                        pass
+
+            await asyncio.sleep(self.reconnect_delay)
+
+
+# Global bus instance (started in main when enabled)
+invalidation_bus = InvalidationBus()
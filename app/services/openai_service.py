@@ -6,12 +6,70 @@ import logging
 
 import openai
 import tiktoken
+import tiktoken.registry
 from openai import AsyncOpenAI
+from tiktoken.model import encoding_name_for_model
 
 from app.config import settings
+from app.logging_setup import SAMPLED
+from app.metrics import register_gauge
+from app.services.prompt_cache import prompt_cache, threshold_for_role
 
 logger = logging.getLogger(__name__)
 
+register_gauge("tiktoken_encodings", lambda: len(tiktoken.registry.ENCODINGS))
+if prompt_cache is not None:
+    register_gauge("prompt_cache_entries", lambda: len(prompt_cache))
+    register_gauge("prompt_cache_bytes", lambda: prompt_cache.memory_bytes)
+
+
+# One client (and HTTP connection pool) shared by all requests and bots
+_client: AsyncOpenAI | None = None
+
+
+def get_openai_client() -> AsyncOpenAI:
+    """Get the shared OpenAI client, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = AsyncOpenAI(api_key=settings.openai_api_key)
+    return _client
+
+
+async def close_openai_client() -> None:
+    """Close the shared OpenAI client."""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+def get_encoding_name(model: str) -> str:
+    """Get tiktoken encoding name for model, falling back to cl100k_base for unknown models."""
+    try:
+        return encoding_name_for_model(model)
+    except KeyError:
+        logger.warning("Unknown model %s, using cl100k_base encoding", model)
+        return "cl100k_base"
+
+
+def count_tokens(text: str, model: str) -> int:
+    """
+    Count tokens in text for specified model.
+
+    Args:
+        text: Text to count tokens for
+        model: OpenAI model name
+
+    Returns:
+        Number of tokens
+    """
+    try:
+        return len(tiktoken.get_encoding(get_encoding_name(model)).encode(text))
+    except Exception as e:
+        logger.error("Error counting tokens: %s", e)
+        # Rough estimation: ~4 characters per token
+        return len(text) // 4
+
 
 class OpenAIService:
     """Service for OpenAI API integration."""
@@ -21,7 +79,7 @@ class OpenAIService:
         if not settings.openai_api_key:
             raise ValueError("OpenAI API key is required")
 
-        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
+        self.client = get_openai_client()
         self.default_model = settings.default_ai_model
 
     async def generate_response(
@@ -29,6 +87,9 @@ class OpenAIService:
         user_message: str,
         role_prompt: str,
         model: str | None = None,
+        role_name: str | None = None,
+        role_prompt_tokens: int | None = None,
+        bot_id: int = 0,
     ) -> tuple[str, int]:
         """
         Generate AI response with role enhancement.
@@ -37,9 +98,13 @@ class OpenAIService:
             user_message: User's input message
             role_prompt: System role prompt for AI
             model: OpenAI model to use (optional)
+            role_name: Role name used to pick the prompt cache threshold (optional)
+            role_prompt_tokens: Precomputed token count of role_prompt (optional)
+            bot_id: Telegram id of the bot serving the user; cached answers are not shared
+                between bots
 
         Returns:
-            Tuple of (AI response, total tokens used)
+            Tuple of (AI response, total tokens used); tokens are 0 for cached answers
 
         Raises:
             openai.APIError: If OpenAI API request fails
@@ -53,9 +118,22 @@ class OpenAIService:
 
         model = model or self.default_model
 
+        # Reuse the answer to a near-duplicate prompt if we have one
+        if prompt_cache is not None:
+            cached = prompt_cache.get(
+                user_message, role_prompt, model, threshold_for_role(role_name), bot_id
+            )
+            if cached is not None:
+                logger.info("Prompt cache hit (similarity %.2f)", cached[1])
+                return cached[0], 0
+
         # Count input tokens to ensure we don't exceed limits
-        input_text = f"{role_prompt}\n\n{user_message}"
-        input_tokens = self.count_tokens(input_text, model)
+        if role_prompt_tokens is not None:
+            # Role presets are tokenized once at startup; only the user part is counted here
+            input_tokens = role_prompt_tokens + self.count_tokens(f"\n\n{user_message}", model)
+        else:
+            input_text = f"{role_prompt}\n\n{user_message}"
+            input_tokens = self.count_tokens(input_text, model)
 
         if input_tokens > settings.max_tokens_per_request:
             raise ValueError(
@@ -72,7 +150,9 @@ class OpenAIService:
             raise ValueError("Input too long, no room for response")
 
         try:
-            logger.info(f"Generating response with {model}, input tokens: {input_tokens}")
+            logger.info(
+                "Generating response with %s, input tokens: %s", model, input_tokens, extra=SAMPLED
+            )
 
             response = await self.client.chat.completions.create(
                 model=model,
@@ -98,23 +178,27 @@ class OpenAIService:
                 else input_tokens + self.count_tokens(ai_response, model)
             )
 
-            logger.info(f"Response generated successfully, total tokens: {total_tokens}")
+            logger.info(
+                "Response generated successfully, total tokens: %s", total_tokens, extra=SAMPLED
+            )
+            if prompt_cache is not None:
+                prompt_cache.put(user_message, role_prompt, model, ai_response, bot_id)
             return ai_response, total_tokens
 
         except openai.RateLimitError as e:
-            logger.error(f"OpenAI rate limit exceeded: {e}")
+            logger.error("OpenAI rate limit exceeded: %s", e)
             raise ValueError(
                 "AI service is currently overloaded. Please try again in a few minutes."
             ) from e
 
         except openai.APIError as e:
-            logger.error(f"OpenAI API error: {e}")
+            logger.error("OpenAI API error: %s", e)
             raise ValueError(
                 "AI service is temporarily unavailable. Please try again later."
             ) from e
 
         except Exception as e:
-            logger.error(f"Unexpected error in OpenAI service: {e}")
+            logger.error("Unexpected error in OpenAI service: %s", e)
             raise ValueError("An unexpected error occurred. Please try again.") from e
 
     def count_tokens(self, text: str, model: str) -> int:
@@ -128,18 +212,7 @@ class OpenAIService:
         Returns:
             Number of tokens
         """
-        try:
-            encoding = tiktoken.encoding_for_model(model)
-            return len(encoding.encode(text))
-        except KeyError:
-            # Fallback for unknown models
-            logger.warning(f"Unknown model {model}, using cl100k_base encoding")
-            encoding = tiktoken.get_encoding("cl100k_base")
-            return len(encoding.encode(text))
-        except Exception as e:
-            logger.error(f"Error counting tokens: {e}")
-            # Rough estimation: ~4 characters per token
-            return len(text) // 4
+        return count_tokens(text, model)
 
     def validate_model(self, model: str) -> bool:
         """
@@ -0,0 +1,173 @@
+"""
+Near-duplicate prompt cache.
+
+Prompts that differ only by casing, punctuation or a word or two should reuse
+an earlier answer. Each prompt is reduced to a MinHash signature of its
+character n-grams; signatures live in one NumPy matrix so a lookup against all
+cached prompts is a single vectorized comparison. Runs fully locally.
+"""
+
+import hashlib
+import logging
+import re
+import zlib
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Mersenne prime for universal hashing; keeps (a * h + b) within uint64
+_PRIME = np.uint64((1 << 31) - 1)
+_NORMALIZE_RE = re.compile(r"[^\w\s]+")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_prompt(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    text = _NORMALIZE_RE.sub(" ", text.lower())
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+class PromptCache:
+    """LRU cache of AI responses looked up by MinHash similarity of prompts."""
+
+    def __init__(
+        self,
+        max_entries: int | None = None,
+        max_bytes: int | None = None,
+        num_hashes: int | None = None,
+        ngram: int | None = None,
+        seed: int = 42,
+    ) -> None:
+        """Initialize cache and preallocate signature matrix."""
+        self.max_entries = max_entries or settings.prompt_cache_max_entries
+        self.max_bytes = max_bytes or settings.prompt_cache_max_mb * 2**20
+        self.num_hashes = num_hashes or settings.prompt_cache_num_hashes
+        self.ngram = ngram or settings.prompt_cache_ngram
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_PRIME), size=self.num_hashes, dtype=np.uint64)
+        self._b = rng.integers(0, int(_PRIME), size=self.num_hashes, dtype=np.uint64)
+
+        # Slot storage: signature rows plus parallel metadata arrays
+        self._signatures = np.zeros((self.max_entries, self.num_hashes), dtype=np.uint32)
+        self._scopes = np.zeros(self.max_entries, dtype=np.uint64)
+        self._last_used = np.full(self.max_entries, -1, dtype=np.int64)
+        self._responses: list[tuple[str, int] | None] = [None] * self.max_entries
+        self._response_bytes = 0
+        self._clock = 0
+
+        # Counters for observability
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._last_used >= 0))
+
+    @property
+    def memory_bytes(self) -> int:
+        """Approximate memory held by signatures and cached responses."""
+        return int(self._signatures.nbytes) + self._response_bytes
+
+    @staticmethod
+    def scope_key(role_prompt: str, model: str, bot_id: int = 0) -> np.uint64:
+        """Stable key so answers are only reused within one bot for the same role and model."""
+        scope = f"{bot_id}\0{model}\0{role_prompt}"
+        digest = hashlib.blake2b(scope.encode(), digest_size=8).digest()
+        return np.uint64(int.from_bytes(digest, "little"))
+
+    def signature(self, text: str) -> np.ndarray | None:
+        """MinHash signature of the prompt's character n-grams (None if too short)."""
+        normalized = normalize_prompt(text)
+        if len(normalized) < self.ngram * 2:
+            return None
+
+        shingles = {normalized[i : i + self.ngram] for i in range(len(normalized) - self.ngram + 1)}
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles)
+        )
+        hashes %= _PRIME
+        # (num_hashes, num_shingles) -> min over shingles
+        permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % _PRIME
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def _similarities(self, signature: np.ndarray, scope: np.uint64) -> np.ndarray:
+        """Estimated Jaccard similarity against every slot (0 for other scopes/empty)."""
+        similarities = (self._signatures == signature).mean(axis=1)
+        similarities[(self._scopes != scope) | (self._last_used < 0)] = 0.0
+        return similarities
+
+    def get(
+        self, prompt: str, role_prompt: str, model: str, threshold: float, bot_id: int = 0
+    ) -> tuple[str, float] | None:
+        """
+        Find a cached response for a near-duplicate prompt.
+
+        Returns:
+            Tuple of (cached response, similarity) or None on miss
+        """
+        signature = self.signature(prompt)
+        if signature is None:
+            return None
+
+        similarities = self._similarities(signature, self.scope_key(role_prompt, model, bot_id))
+        slot = int(similarities.argmax())
+        similarity = float(similarities[slot])
+        if similarity < threshold:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._clock += 1
+        self._last_used[slot] = self._clock
+        cached = self._responses[slot]
+        assert cached is not None  # nosec B101 - slot is in use
+        return cached[0], similarity
+
+    def put(
+        self, prompt: str, role_prompt: str, model: str, response: str, bot_id: int = 0
+    ) -> None:
+        """Store response for prompt, evicting least recently used entries as needed."""
+        signature = self.signature(prompt)
+        if signature is None:
+            return
+
+        size = len(response.encode())
+        if size + self._signatures.nbytes > self.max_bytes:
+            return
+
+        free = np.flatnonzero(self._last_used < 0)
+        slot = int(free[0]) if free.size else self._evict_lru()
+        while self.memory_bytes + size > self.max_bytes and len(self):
+            self._evict_lru()
+
+        self._clock += 1
+        self._signatures[slot] = signature
+        self._scopes[slot] = self.scope_key(role_prompt, model, bot_id)
+        self._last_used[slot] = self._clock
+        self._responses[slot] = (response, size)
+        self._response_bytes += size
+
+    def _evict_lru(self) -> int:
+        """Free the least recently used slot and return its index."""
+        used = np.where(self._last_used >= 0, self._last_used, np.iinfo(np.int64).max)
+        slot = int(used.argmin())
+        cached = self._responses[slot]
+        if cached is not None:
+            self._response_bytes -= cached[1]
+        self._responses[slot] = None
+        self._last_used[slot] = -1
+        return slot
+
+
+def threshold_for_role(role_name: str | None) -> float:
+    """Similarity threshold configured for a role, falling back to the default."""
+    if role_name and role_name in settings.prompt_cache_role_thresholds:
+        return settings.prompt_cache_role_thresholds[role_name]
+    return settings.prompt_cache_threshold
+
+
+# Global cache instance shared by all OpenAIService instances
+prompt_cache = PromptCache() if settings.prompt_cache_enabled else None
@@ -0,0 +1,141 @@
+"""
+In-memory registry of role presets.
+
+Presets are loaded once at startup together with their prompt token counts,
+so handlers neither re-read nor re-tokenize shared system prompts.
+"""
+
+import logging
+from dataclasses import dataclass
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import DEFAULT_ROLE_NAME, Role, UserRole, get_or_create_role
+from app.services.invalidation import invalidation_bus
+from app.services.openai_service import count_tokens, get_encoding_name
+from app.tenants import tenant_registry
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RolePreset:
+    """Immutable, interned copy of a role preset."""
+
+    id: int
+    name: str
+    prompt: str
+
+
+class RoleRegistry:
+    """Role presets and their token counts per tiktoken encoding."""
+
+    def __init__(self) -> None:
+        self._presets: dict[int, RolePreset] = {}
+        self._token_counts: dict[tuple[int, str], int] = {}
+
+    def __len__(self) -> int:
+        return len(self._presets)
+
+    async def load(self, session: AsyncSession) -> None:
+        """
+        Load presets, intern copies of preset prompts and precompute token counts.
+
+        The default preset and each bot's default preset are created from
+        settings (or updated if the configured prompt changed), and user roles
+        still holding a verbatim copy of a preset prompt are switched to
+        reference the preset instead.
+        """
+        configured = {DEFAULT_ROLE_NAME: settings.default_role_prompt}
+        for tenant in tenant_registry.tenants:
+            configured[tenant.default_role_name] = tenant.default_role_prompt
+
+        changed: list[Role] = []
+        for name, prompt in configured.items():
+            role = await get_or_create_role(session, name, prompt)
+            if role.prompt != prompt:
+                role.prompt = prompt
+                changed.append(role)
+
+        result = await session.execute(select(Role))
+        roles = list(result.scalars().all())
+
+        interned = 0
+        for role in roles:
+            stmt = (
+                update(UserRole)
+                .where(UserRole.role_prompt == role.prompt)
+                .values(role_id=role.id, role_name=role.name, role_prompt=None)
+            )
+            interned += (await session.execute(stmt)).rowcount
+        await session.commit()
+        for role in changed:
+            # Other replicas still hold the old prompt and its token count
+            await invalidation_bus.publish("roles", str(role.id))
+
+        self.invalidate()
+        for role in roles:
+            self.prompt_tokens(self._add(role), settings.default_ai_model)
+
+        logger.info(
+            "Loaded %s role presets, interned %s user prompts", len(self._presets), interned
+        )
+
+    def _add(self, role: Role) -> RolePreset:
+        preset = RolePreset(id=role.id, name=role.name, prompt=role.prompt)
+        self._presets[role.id] = preset
+        return preset
+
+    async def get(self, session: AsyncSession, role_id: int) -> RolePreset | None:
+        """Get preset by id, loading presets created after startup (e.g. by another replica)."""
+        preset = self._presets.get(role_id)
+        if preset is None:
+            role = await session.get(Role, role_id)
+            if role is not None:
+                preset = self._add(role)
+        return preset
+
+    def prompt_tokens(self, preset: RolePreset, model: str) -> int:
+        """Token count of the preset prompt for the model's encoding (cached)."""
+        key = (preset.id, get_encoding_name(model))
+        count = self._token_counts.get(key)
+        if count is None:
+            count = count_tokens(preset.prompt, model)
+            self._token_counts[key] = count
+        return count
+
+    def invalidate(self, role_id: int | None = None) -> None:
+        """Drop cached presets (all when role_id is None) so they are re-read on next use."""
+        if role_id is None:
+            self._presets.clear()
+            self._token_counts.clear()
+            return
+
+        self._presets.pop(role_id, None)
+        for key in [key for key in self._token_counts if key[0] == role_id]:
+            del self._token_counts[key]
+
+    async def resolve(
+        self, session: AsyncSession, user_role: UserRole, model: str
+    ) -> tuple[str, int | None]:
+        """
+        Resolve the prompt to use for a user.
+
+        Returns:
+            Tuple of (role prompt, precomputed token count or None for custom prompts)
+        """
+        if user_role.role_prompt:
+            return user_role.role_prompt, None
+
+        preset = await self.get(session, user_role.role_id) if user_role.role_id else None
+        if preset is None:
+            return settings.default_role_prompt, None
+
+        return preset.prompt, self.prompt_tokens(preset, model)
+
+
+# Global registry instance
+role_registry = RoleRegistry()
+invalidation_bus.subscribe("roles", lambda key: role_registry.invalidate(int(key) if key else None))
@@ -0,0 +1,206 @@
+"""
+Outbound Telegram send scheduler.
+
+Wraps every Bot API request made through the aiogram session and keeps us
+under Telegram's flood limits (~30 msg/s globally, ~1 msg/s per chat).
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, SendChatAction, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Bot API methods that deliver something to a chat and count towards flood limits
+RATE_LIMITED_METHODS = frozenset(
+    {
+        "SendMessage",
+        "SendPhoto",
+        "SendDocument",
+        "SendAudio",
+        "SendVideo",
+        "SendVoice",
+        "SendAnimation",
+        "SendSticker",
+        "SendMediaGroup",
+        "SendLocation",
+        "SendPoll",
+        "ForwardMessage",
+        "CopyMessage",
+        "EditMessageText",
+    }
+)
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursting up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float | None = None) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    @property
+    def is_full(self) -> bool:
+        """Whether the bucket has fully refilled (i.e. the chat is idle)."""
+        self._refill()
+        return self.tokens >= self.capacity
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it."""
+        async with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+    def pause(self, seconds: float) -> None:
+        """Drain the bucket so the next token is only available after `seconds`."""
+        self._refill()
+        self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+
+class SendScheduler(BaseRequestMiddleware):
+    """Session middleware applying global and per-chat token buckets to Bot API calls."""
+
+    def __init__(
+        self,
+        global_rate: float | None = None,
+        chat_rate: float | None = None,
+        max_retries: int | None = None,
+        chat_action_ttl: float | None = None,
+        max_tracked_chats: int = 10_000,
+    ) -> None:
+        """Initialize scheduler, falling back to values from settings."""
+        self.global_bucket = TokenBucket(global_rate or settings.telegram_global_rate)
+        self.chat_rate = chat_rate or settings.telegram_chat_rate
+        self.max_retries = max_retries if max_retries is not None else settings.telegram_max_retries
+        self.chat_action_ttl = (
+            chat_action_ttl if chat_action_ttl is not None else settings.telegram_chat_action_ttl
+        )
+        self.max_tracked_chats = max_tracked_chats
+
+        self._chat_buckets: OrderedDict[Any, TokenBucket] = OrderedDict()
+        # Last chat action sent per chat: chat_id -> {action: sent_at}
+        self._chat_actions: OrderedDict[Any, dict[str, float]] = OrderedDict()
+
+        # Counters for observability
+        self.sent = 0
+        self.retried = 0
+        self.merged_chat_actions = 0
+
+    @property
+    def tracked_chats(self) -> int:
+        """Number of per-chat buckets held in memory."""
+        return len(self._chat_buckets)
+
+    @property
+    def tracked_chat_actions(self) -> int:
+        """Number of chats with remembered chat actions."""
+        return len(self._chat_actions)
+
+    def _chat_bucket(self, chat_id: Any) -> TokenBucket:
+        """Get per-chat bucket, evicting idle chats when too many are tracked."""
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(self.chat_rate, capacity=1.0)
+            self._chat_buckets[chat_id] = bucket
+            if len(self._chat_buckets) > self.max_tracked_chats:
+                for old_chat_id in list(self._chat_buckets)[: len(self._chat_buckets) // 2]:
+                    if self._chat_buckets[old_chat_id].is_full:
+                        del self._chat_buckets[old_chat_id]
+        else:
+            self._chat_buckets.move_to_end(chat_id)
+        return bucket
+
+    def _is_redundant_chat_action(self, method: SendChatAction) -> bool:
+        """Check whether the same chat action is still displayed for the chat."""
+        action = str(method.action)
+        now = time.monotonic()
+        actions = self._chat_actions.get(method.chat_id)
+        if actions is None:
+            actions = self._chat_actions[method.chat_id] = {}
+        else:
+            self._chat_actions.move_to_end(method.chat_id)
+        sent_at = actions.get(action)
+        if sent_at is not None and now - sent_at < self.chat_action_ttl:
+            return True
+
+        actions[action] = now
+        while len(self._chat_actions) > self.max_tracked_chats:
+            self._chat_actions.popitem(last=False)
+        return False
+
+    def _forget_chat_actions(self, chat_id: Any) -> None:
+        """A sent message cancels the chat's action indicator on the client."""
+        self._chat_actions.pop(chat_id, None)
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        """Throttle, de-duplicate and retry outgoing Bot API requests."""
+        if isinstance(method, SendChatAction) and self._is_redundant_chat_action(method):
+            self.merged_chat_actions += 1
+            return Response[bool](ok=True, result=True)  # type: ignore[return-value]
+
+        method_name = type(method).__name__
+        chat_id = getattr(method, "chat_id", None)
+        rate_limited = method_name in RATE_LIMITED_METHODS
+        chat_bucket = self._chat_bucket(chat_id) if rate_limited and chat_id is not None else None
+
+        attempt = 0
+        while True:
+            if rate_limited:
+                if chat_bucket is not None:
+                    await chat_bucket.acquire()
+                await self.global_bucket.acquire()
+
+            try:
+                response = await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                if attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                self.retried += 1
+                logger.warning(
+                    "Flood control on %s (chat %s), retrying in %ss (%s/%s)",
+                    method_name,
+                    chat_id,
+                    e.retry_after,
+                    attempt,
+                    self.max_retries,
+                )
+                if chat_bucket is not None:
+                    chat_bucket.pause(e.retry_after)
+                else:
+                    await asyncio.sleep(e.retry_after)
+                continue
+
+            self.sent += 1
+            if rate_limited and chat_id is not None:
+                self._forget_chat_actions(chat_id)
+            return response
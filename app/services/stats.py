@@ -0,0 +1,195 @@
+"""
+Usage statistics snapshot for the admin /stats command.
+
+Aggregates are computed in SQL only when an admin asks for them and kept in
+memory for the refresh interval: replicas nobody runs /stats on never query,
+and running it repeatedly is served from the snapshot. A stale snapshot is
+returned immediately while a single background refresh replaces it.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import ColumnElement, case, distinct, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.database import Conversation
+
+logger = logging.getLogger(__name__)
+
+# Reporting windows, shortest first
+WINDOWS: dict[str, timedelta] = {
+    "1h": timedelta(hours=1),
+    "24h": timedelta(hours=24),
+    "7d": timedelta(days=7),
+}
+
+
+@dataclass
+class ModelUsage:
+    """Messages and tokens for one model within a window."""
+
+    messages: int = 0
+    tokens: int = 0
+
+
+@dataclass
+class WindowStats:
+    """Aggregates for one reporting window."""
+
+    active_users: int = 0
+    models: dict[str, ModelUsage] = field(default_factory=dict)
+    p50_response_length: int | None = None
+
+
+@dataclass
+class StatsSnapshot:
+    """Aggregates for all windows at a point in time."""
+
+    generated_at: datetime
+    windows: dict[str, WindowStats]
+
+    def format(self) -> str:
+        """Format snapshot as an HTML message."""
+        lines = ["📊 <b>Usage statistics</b>"]
+        for name, window in self.windows.items():
+            lines.append(f"\n<b>Last {name}</b>")
+            lines.append(f"• Active users: {window.active_users}")
+            for model, usage in sorted(window.models.items()):
+                lines.append(f"• {model}: {usage.messages} messages, {usage.tokens} tokens")
+            if window.p50_response_length is not None:
+                lines.append(f"• Median response length: {window.p50_response_length} chars")
+        lines.append(f"\n<i>Updated {self.generated_at:%Y-%m-%d %H:%M:%S} UTC</i>")
+        return "\n".join(lines)
+
+
+def _in_window(since: datetime, value: ColumnElement[Any]) -> ColumnElement[Any]:
+    """Value for rows created since `since`, NULL otherwise (for conditional aggregates)."""
+    return case((Conversation.created_at >= since, value))
+
+
+async def median_response_length(session: AsyncSession, since: datetime) -> int | None:
+    """Median AI response length for conversations created since `since`."""
+    length = func.length(Conversation.ai_response)
+    window = Conversation.created_at >= since
+
+    if session.bind.dialect.name == "postgresql":
+        stmt = select(func.percentile_cont(0.5).within_group(length)).where(window)
+        value = (await session.execute(stmt)).scalar()
+        return int(value) if value is not None else None
+
+    # Portable fallback: pick the middle row
+    total = (await session.execute(select(func.count()).where(window))).scalar_one()
+    if not total:
+        return None
+    stmt = select(length).where(window).order_by(length).offset((total - 1) // 2).limit(1)
+    return int((await session.execute(stmt)).scalar_one())
+
+
+async def compute_snapshot(session: AsyncSession, now: datetime | None = None) -> StatsSnapshot:
+    """Compute all aggregates with a single scan per query over the longest window."""
+    # Timestamps are stored as naive UTC (database timezone is UTC)
+    now = now or datetime.now(UTC).replace(tzinfo=None)
+    since = {name: now - delta for name, delta in WINDOWS.items()}
+    oldest = min(since.values())
+
+    # Active users per window
+    stmt = select(
+        *(func.count(distinct(_in_window(since[name], Conversation.user_id))) for name in WINDOWS)
+    ).where(Conversation.created_at >= oldest)
+    active_users = (await session.execute(stmt)).one()
+
+    # Messages and tokens by model per window
+    columns = []
+    for name in WINDOWS:
+        columns.append(func.count(_in_window(since[name], Conversation.id)))
+        columns.append(
+            func.coalesce(func.sum(_in_window(since[name], Conversation.tokens_used)), 0)
+        )
+    stmt = (
+        select(Conversation.model_used, *columns)
+        .where(Conversation.created_at >= oldest)
+        .group_by(Conversation.model_used)
+    )
+    model_rows = (await session.execute(stmt)).all()
+
+    windows: dict[str, WindowStats] = {}
+    for i, name in enumerate(WINDOWS):
+        window = WindowStats(active_users=active_users[i])
+        for row in model_rows:
+            messages, tokens = row[1 + 2 * i], row[2 + 2 * i]
+            if messages:
+                window.models[row[0]] = ModelUsage(messages=messages, tokens=int(tokens))
+        window.p50_response_length = await median_response_length(session, since[name])
+        windows[name] = window
+
+    return StatsSnapshot(generated_at=now, windows=windows)
+
+
+class StatsService:
+    """Keep a lazily refreshed statistics snapshot in memory."""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] | None = None,
+        interval: float | None = None,
+    ) -> None:
+        """Initialize service with refresh interval from settings by default."""
+        self.session_factory = session_factory
+        self.interval = interval if interval is not None else settings.stats_refresh_interval
+        self.snapshot: StatsSnapshot | None = None
+        self._refreshed_at = 0.0
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task[StatsSnapshot | None] | None = None
+
+    @property
+    def is_stale(self) -> bool:
+        """Whether the snapshot is missing or older than the refresh interval."""
+        return self.snapshot is None or time.monotonic() - self._refreshed_at >= self.interval
+
+    async def refresh(self) -> StatsSnapshot | None:
+        """Recompute snapshot; keeps the previous one if the database is unavailable."""
+        if self.session_factory is None:
+            return self.snapshot
+        try:
+            async with self._lock, self.session_factory() as session:
+                self.snapshot = await compute_snapshot(session)
+                self._refreshed_at = time.monotonic()
+        except Exception as e:
+            logger.error("Failed to refresh stats snapshot: %s", e)
+        return self.snapshot
+
+    async def get_snapshot(self) -> StatsSnapshot | None:
+        """
+        Latest snapshot, computing it on first use.
+
+        All refreshes go through one task, so concurrent /stats calls never
+        stack aggregate queries: cold calls wait for it together, and a stale
+        snapshot is returned as is while it runs in the background.
+        """
+        if self.is_stale and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self.refresh())
+        if self.snapshot is None and self._task is not None:
+            # Shielded: one caller giving up must not cancel the others' refresh
+            return await asyncio.shield(self._task)
+        return self.snapshot
+
+    def start(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        """Enable refreshes from the given database (nothing is queried until /stats)."""
+        self.session_factory = session_factory
+
+    async def stop(self) -> None:
+        """Cancel a background refresh in progress."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+# Global service instance (enabled in main when admins are configured)
+stats_service = StatsService()
@@ -0,0 +1,140 @@
+"""
+Graceful shutdown coordination.
+
+On SIGTERM/SIGINT we stop accepting updates, run flush hooks releasing work
+that is held back (e.g. debounced messages), let in-flight handlers finish
+within a grace period and only then close clients.
+"""
+
+import asyncio
+import logging
+import signal
+import time
+from collections.abc import Awaitable, Callable
+from contextlib import suppress
+from dataclasses import dataclass
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DrainReport:
+    """Outcome of draining in-flight handler tasks."""
+
+    finished: int = 0
+    cancelled: int = 0
+
+
+class ShutdownCoordinator:
+    """Track in-flight update handlers and drain them on shutdown."""
+
+    def __init__(self, grace_period: float | None = None) -> None:
+        """Initialize coordinator with grace period from settings by default."""
+        self.grace_period = (
+            grace_period if grace_period is not None else settings.shutdown_grace_period
+        )
+        self.shutdown_event = asyncio.Event()
+        self._tasks: set[asyncio.Task[Any]] = set()
+        self._flush_hooks: list[Callable[[], Awaitable[None]]] = []
+
+    @property
+    def accepting(self) -> bool:
+        """Whether new updates should still be processed."""
+        return not self.shutdown_event.is_set()
+
+    @property
+    def in_flight(self) -> int:
+        """Number of handler tasks currently running."""
+        return len(self._tasks)
+
+    def install_signal_handlers(self) -> None:
+        """Request shutdown on SIGTERM/SIGINT instead of exiting immediately."""
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            with suppress(NotImplementedError):  # Not supported on Windows
+                loop.add_signal_handler(sig, self.request_shutdown, sig)
+
+    def request_shutdown(self, sig: signal.Signals | None = None) -> None:
+        """Stop accepting updates and wake up whoever waits for shutdown."""
+        if self.shutdown_event.is_set():
+            return
+        logger.info("Shutdown requested (%s)", sig.name if sig else "manual")
+        self.shutdown_event.set()
+
+    async def wait(self, task: asyncio.Task[Any]) -> None:
+        """Wait until `task` completes or shutdown is requested."""
+        stop = asyncio.create_task(self.shutdown_event.wait())
+        await asyncio.wait({task, stop}, return_when=asyncio.FIRST_COMPLETED)
+        stop.cancel()
+        if task.done():
+            task.result()  # Propagate errors from the server/polling task
+
+    def track(self, task: asyncio.Task[Any]) -> None:
+        """Register a handler task to be drained on shutdown."""
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def add_flush_hook(self, hook: Callable[[], Awaitable[None]]) -> None:
+        """Register a coroutine releasing held-back work; it runs before handlers are drained."""
+        self._flush_hooks.append(hook)
+
+    async def drain(self) -> DrainReport:
+        """Wait for in-flight tasks up to the grace period, then cancel the rest."""
+        report = DrainReport()
+        # Held-back work must be released before waiting, or it is cancelled at the deadline
+        for hook in self._flush_hooks:
+            try:
+                await hook()
+            except Exception as e:
+                logger.error("Shutdown flush hook failed: %s", e)
+
+        pending = set(self._tasks)
+        if pending:
+            logger.info(
+                "Waiting up to %ss for %s in-flight updates", self.grace_period, len(pending)
+            )
+            deadline = time.monotonic() + self.grace_period
+            # Tasks may spawn while draining (e.g. webhook requests already accepted)
+            while pending:
+                timeout = max(deadline - time.monotonic(), 0)
+                done, pending = await asyncio.wait(pending, timeout=timeout)
+                report.finished += len(done)
+                pending |= self._tasks - done
+                if timeout == 0:
+                    break
+
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            report.cancelled = len(pending)
+
+        logger.info(
+            "Shutdown drain complete: %s finished, %s cancelled", report.finished, report.cancelled
+        )
+        return report
+
+
+class InFlightMiddleware(BaseMiddleware):
+    """Outer update middleware registering the handler task with the coordinator."""
+
+    def __init__(self, coordinator: ShutdownCoordinator) -> None:
+        self.coordinator = coordinator
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        """Track current task while the update is being handled."""
+        task = asyncio.current_task()
+        if task is not None:
+            self.coordinator.track(task)
+        return await handler(event, data)
@@ -0,0 +1,119 @@
+"""
+Bots (tenants) served by this process.
+
+In single-bot mode there is one tenant built from BOT_TOKEN and the global
+settings. With BOTS configured, several bots share one dispatcher, database
+engine and OpenAI client; each keeps its own greeting name and default role,
+and its users are stored under its Telegram bot id.
+"""
+
+from dataclasses import dataclass
+
+from aiogram import Bot
+from aiogram.utils.token import TokenValidationError, extract_bot_id
+
+from app.config import BotConfig, settings
+from app.database import DEFAULT_ROLE_NAME
+
+# Name of the tenant built from BOT_TOKEN in single-bot mode
+DEFAULT_TENANT_NAME = "default"
+
+
+@dataclass(frozen=True)
+class Tenant:
+    """Resolved per-bot settings."""
+
+    name: str
+    token: str
+    bot_id: int
+    project_name: str
+    default_role_name: str
+    default_role_prompt: str
+
+
+def bot_id_from_token(token: str) -> int:
+    """Telegram bot id encoded in the token (0 when there is no valid token, e.g. in tests)."""
+    try:
+        return extract_bot_id(token)
+    except TokenValidationError:
+        return 0
+
+
+def derive_role_name(config: BotConfig) -> str:
+    """Shared preset name, or a per-bot one when the bot has its own prompt."""
+    if config.default_role_prompt:
+        return f"{config.name}_assistant"[:50]
+    return DEFAULT_ROLE_NAME
+
+
+def build_tenant(config: BotConfig) -> Tenant:
+    """Fill unset per-bot fields from global settings."""
+    return Tenant(
+        name=config.name,
+        token=config.token,
+        bot_id=bot_id_from_token(config.token),
+        project_name=config.project_name or settings.project_name,
+        default_role_name=config.default_role_name or derive_role_name(config),
+        default_role_prompt=config.default_role_prompt or settings.default_role_prompt,
+    )
+
+
+def load_tenants(configs: list[BotConfig] | None = None) -> list[Tenant]:
+    """
+    Build tenants from BOTS, or a single one from BOT_TOKEN.
+
+    Raises:
+        ValueError: If names or tokens repeat, or one role name maps to two prompts
+    """
+    configs = configs if configs is not None else settings.bots
+    if not configs:
+        configs = [BotConfig(name=DEFAULT_TENANT_NAME, token=settings.bot_token)]
+
+    tenants = [build_tenant(config) for config in configs]
+
+    names = [tenant.name for tenant in tenants]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Bot names must be unique: {names}")
+    bot_ids = [tenant.bot_id for tenant in tenants]
+    if len(set(bot_ids)) != len(bot_ids):
+        raise ValueError("Bot tokens must belong to different bots")
+
+    # Role presets are shared by name, so a name cannot carry two prompts
+    prompts = {DEFAULT_ROLE_NAME: settings.default_role_prompt}
+    for tenant in tenants:
+        prompt = prompts.setdefault(tenant.default_role_name, tenant.default_role_prompt)
+        if prompt != tenant.default_role_prompt:
+            raise ValueError(
+                f"Role {tenant.default_role_name!r} is configured with different prompts"
+            )
+    return tenants
+
+
+class TenantRegistry:
+    """Look up the tenant of the bot that received an update."""
+
+    def __init__(self, tenants: list[Tenant] | None = None) -> None:
+        self._by_bot_id: dict[int, Tenant] = {}
+        self.tenants: list[Tenant] = []
+        self.configure(tenants or load_tenants())
+
+    def configure(self, tenants: list[Tenant]) -> None:
+        """Replace the served tenants; the first one is the primary."""
+        self.tenants = list(tenants)
+        self._by_bot_id = {tenant.bot_id: tenant for tenant in tenants}
+
+    @property
+    def primary(self) -> Tenant:
+        """First configured tenant (owns rows created before multi-bot mode)."""
+        return self.tenants[0]
+
+    def get(self, bot: Bot | None) -> Tenant:
+        """Tenant of `bot`, falling back to the primary one."""
+        bot_id = getattr(bot, "id", None)
+        if isinstance(bot_id, int):
+            return self._by_bot_id.get(bot_id, self.primary)
+        return self.primary
+
+
+# Global registry (configured from settings at import)
+tenant_registry = TenantRegistry()
@@ -0,0 +1,105 @@
+"""
+Benchmark per-message ORM and driver CPU time of the hot queries.
+
+Compares the original per-message statements (built with select()/ORM add on
+every call) against the cached statements in app.database.
+
+Usage:
+    python scripts/bench_hot_queries.py                      # in-memory SQLite
+    python scripts/bench_hot_queries.py --database-url postgresql+asyncpg://...
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import delete, select  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+
+from app.database import (  # noqa: E402
+    Base,
+    Conversation,
+    User,
+    UserRole,
+    save_conversation,
+    select_user_by_telegram_id,
+    select_user_role_by_user_id,
+)
+
+CONVERSATION = {
+    "user_message": "How do I reverse a list?",
+    "ai_response": "Use reversed() or slicing.",
+    "model_used": "gpt-3.5-turbo",
+    "tokens_used": 42,
+    "role_used": "helpful_assistant",
+}
+
+
+async def legacy_message(session: AsyncSession, telegram_id: int) -> None:
+    """Hot queries as originally written in the handlers."""
+    user = (await session.execute(select(User).where(User.telegram_id == telegram_id))).scalar_one()
+    (await session.execute(select(UserRole).where(UserRole.user_id == user.id))).scalar_one()
+    session.add(Conversation(user_id=user.id, **CONVERSATION))
+    await session.commit()
+
+
+async def cached_message(session: AsyncSession, telegram_id: int) -> None:
+    """Hot queries using the cached statements."""
+    user = (await session.execute(select_user_by_telegram_id(telegram_id, 0))).scalar_one()
+    (await session.execute(select_user_role_by_user_id(user.id))).scalar_one()
+    await save_conversation(session, user_id=user.id, **CONVERSATION)
+
+
+async def measure(engine, variant, messages: int) -> float:  # noqa: ANN001
+    """Average CPU microseconds per message (process time covers ORM + driver work)."""
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        for i in range(50):  # Warm-up: fill compiled and prepared statement caches
+            await variant(session, 1 + i % 10)
+        await session.execute(delete(Conversation))
+        await session.commit()
+
+        started = time.process_time()
+        for i in range(messages):
+            await variant(session, 1 + i % 10)
+        elapsed = time.process_time() - started
+        session.expunge_all()
+    return elapsed / messages * 1_000_000
+
+
+async def main() -> None:
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--database-url", default="sqlite+aiosqlite:///:memory:")
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    engine = create_async_engine(args.database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engine) as session:
+        users = [User(telegram_id=1 + i) for i in range(10)]
+        session.add_all(users)
+        await session.flush()
+        session.add_all(UserRole(user_id=user.id) for user in users)
+        await session.commit()
+
+    results: dict[str, list[float]] = {"legacy": [], "cached": []}
+    for _ in range(args.rounds):
+        results["legacy"].append(await measure(engine, legacy_message, args.messages))
+        results["cached"].append(await measure(engine, cached_message, args.messages))
+    await engine.dispose()
+
+    legacy, cached = min(results["legacy"]), min(results["cached"])
+    print(f"database: {engine.dialect.name}, messages per round: {args.messages}")
+    print(f"legacy statements: {legacy:8.1f} us CPU/message")
+    print(f"cached statements: {cached:8.1f} us CPU/message ({(1 - cached / legacy):+.0%} saved)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
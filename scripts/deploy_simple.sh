@@ -34,7 +34,7 @@ docker ps --format "table {{.Names}}\t{{.Status}}\t{{.Ports}}"
 # Stop old individual PostgreSQL if running
 echo "🛑 Stopping old individual PostgreSQL containers..."
 docker stop hello-ai-bot_postgres 2>/dev/null || echo "Old PostgreSQL container not running"
-docker stop hello-ai-bot_app 2>/dev/null || echo "Old bot container not running"
+docker stop -t 30 hello-ai-bot_app 2>/dev/null || echo "Old bot container not running"
 docker stop hello-ai-bot_migration 2>/dev/null || echo "Old migration container not running"
 
 # Ensure shared PostgreSQL is running
@@ -78,7 +78,7 @@ docker compose --profile production up -d
 # Basic health check
 echo "🔍 Checking service health..."
 sleep 30
-if docker compose --profile production exec -T bot python -c "from app.config import settings; print('✅ Bot healthy')"; then
+if docker compose --profile production exec -T bot wget -q -O /dev/null "http://127.0.0.1:${SERVER_PORT:-8000}/ready"; then
     echo "✅ Deployment successful!"
 else
     echo "❌ Health check failed"
@@ -15,6 +15,22 @@ from sqlalchemy.pool import StaticPool
 from app.database import Base
 
 
+def pytest_addoption(parser: pytest.Parser) -> None:
+    """Add benchmark options."""
+    group = parser.getgroup("benchmark")
+    group.addoption(
+        "--benchmark-max-regression",
+        type=float,
+        default=50.0,
+        help="Fail benchmarks slower than their baseline by more than this percentage",
+    )
+    group.addoption(
+        "--benchmark-update",
+        action="store_true",
+        help="Record measured benchmark results as the new baselines",
+    )
+
+
 @pytest.fixture(scope="session")
 def event_loop() -> asyncio.AbstractEventLoop:
     """Create event loop for the test session."""
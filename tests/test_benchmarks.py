@@ -0,0 +1,268 @@
+"""
+Benchmarks for hot paths, compared against baselines stored in the repo.
+
+Each round times the benchmark and then a fixed pure-Python calibration
+workload; the result is the median ratio over ROUNDS rounds, so CPU frequency
+and load changes cancel out and baselines recorded on one machine stay usable
+on faster or slower ones. A benchmark fails when it is slower than its
+baseline by more than --benchmark-max-regression percent (default 50).
+
+Benchmarks are excluded from the default test run (see addopts in pyproject).
+
+Usage:
+    pytest -m benchmark                                   # compare against baselines
+    pytest -m benchmark --benchmark-update                # record new baselines
+"""
+
+import gc
+import json
+import statistics
+import time
+from collections.abc import Awaitable, Callable, Generator
+from pathlib import Path
+from typing import Any
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+import tiktoken
+from aiogram.types import Update
+from aiogram.types import User as TelegramUser
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.handlers import check_predefined_response, process_ai_message
+from app.services.openai_service import OpenAIService
+
+pytestmark = pytest.mark.benchmark
+
+BASELINES_PATH = Path(__file__).parent / "benchmark_baselines.json"
+ROUNDS = 15
+MODEL = "gpt-3.5-turbo"
+SAMPLE_TEXT = "The quick brown fox jumps over the lazy dog. Съешь же ещё этих булок. "
+
+# Measured results of this run (calibration units), written back with --benchmark-update
+results: dict[str, float] = {}
+
+
+def load_baselines() -> dict[str, float]:
+    """Load stored baselines."""
+    if not BASELINES_PATH.exists():
+        return {}
+    return json.loads(BASELINES_PATH.read_text(encoding="utf-8"))
+
+
+def calibration_workload() -> None:
+    """Fixed CPU-bound workload used as the unit of measurement."""
+    words = [f"word{i * 7919 % 1000}" for i in range(1000)]
+    " ".join(sorted(words)).upper().split()
+
+
+def timed(func: Callable[[], Any], number: int) -> float:
+    """Average seconds per call over `number` calls."""
+    started = time.perf_counter()
+    for _ in range(number):
+        func()
+    return (time.perf_counter() - started) / number
+
+
+def measure(func: Callable[[], Any], number: int) -> float:
+    """Median time per call over ROUNDS rounds, in calibration units."""
+    ratios = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(ROUNDS):
+            seconds = timed(func, number)
+            ratios.append(seconds / timed(calibration_workload, 20))
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return statistics.median(ratios)
+
+
+async def ameasure(func: Callable[[], Awaitable[Any]], number: int) -> float:
+    """Async counterpart of measure()."""
+    ratios = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        for _ in range(number):
+            await func()
+        seconds = (time.perf_counter() - started) / number
+        ratios.append(seconds / timed(calibration_workload, 20))
+    return statistics.median(ratios)
+
+
+def build_encoding() -> tiktoken.Encoding:
+    """
+    Small BPE encoding built in code, so token counting is benchmarked offline.
+
+    It uses the cl100k_base split pattern and runs the same tiktoken encoder,
+    with merges for every prefix of the sample words instead of the
+    downloaded vocabulary.
+    """
+    ranks = {bytes([i]): i for i in range(256)}
+    for word in SAMPLE_TEXT.split():
+        piece = f" {word}".encode()
+        for end in range(2, len(piece) + 1):
+            ranks.setdefault(piece[:end], len(ranks))
+    return tiktoken.Encoding(
+        name="benchmark",
+        pat_str=r"""'(?i:[sdmt]|ll|ve|re)|[^\r\n\p{L}\p{N}]?+\p{L}++|\p{N}{1,3}+| ?[^\s\p{L}\p{N}]++[\r\n]*+|\s++$|\s*[\r\n]|\s+(?!\S)|\s""",
+        mergeable_ranks=ranks,
+        special_tokens={},
+    )
+
+
+@pytest.fixture(scope="module")
+def encoding() -> Generator[tiktoken.Encoding, None, None]:
+    """Serve the offline encoding to count_tokens for the whole module."""
+    bench_encoding = build_encoding()
+    with patch("app.services.openai_service.tiktoken.get_encoding", return_value=bench_encoding):
+        yield bench_encoding
+
+
+@pytest.fixture(scope="module", autouse=True)
+def record_baselines(request: pytest.FixtureRequest) -> Generator[None, None, None]:
+    """Write measured results as baselines after the module when --benchmark-update is set."""
+    yield
+    if request.config.getoption("--benchmark-update") and results:
+        baselines = load_baselines()
+        baselines.update({name: float(f"{value:.4g}") for name, value in results.items()})
+        BASELINES_PATH.write_text(
+            json.dumps(dict(sorted(baselines.items())), indent=2) + "\n", encoding="utf-8"
+        )
+
+
+@pytest.fixture
+def check(request: pytest.FixtureRequest) -> Callable[[str, float], None]:
+    """Compare a measurement (calibration units) against its stored baseline."""
+    max_regression = request.config.getoption("--benchmark-max-regression")
+    update = request.config.getoption("--benchmark-update")
+    baselines = load_baselines()
+
+    def _check(name: str, relative: float) -> None:
+        results[name] = relative
+        if update:
+            return
+
+        baseline = baselines.get(name)
+        if baseline is None:
+            pytest.fail(f"No baseline for {name}, record one with --benchmark-update")
+
+        limit = baseline * (1 + max_regression / 100)
+        assert relative <= limit, (
+            f"{name} regressed: {relative:.3f} vs baseline {baseline:.3f} calibration units "
+            f"({relative / baseline - 1:+.0%}, allowed +{max_regression:.0f}%)"
+        )
+
+    return _check
+
+
+def update_payload(text: str, entities: list[dict[str, Any]] | None = None) -> dict[str, Any]:
+    """Webhook payload for a private text message."""
+    message: dict[str, Any] = {
+        "message_id": 42,
+        "date": 1640995200,
+        "chat": {"id": 123456789, "type": "private", "first_name": "Test", "username": "test"},
+        "from": {
+            "id": 123456789,
+            "is_bot": False,
+            "first_name": "Test",
+            "last_name": "User",
+            "username": "testuser",
+            "language_code": "en",
+        },
+        "text": text,
+    }
+    if entities is not None:
+        message["entities"] = entities
+    return {"update_id": 1000, "message": message}
+
+
+def completion(content: str, total_tokens: int) -> Mock:
+    """Chat completion response as returned by the OpenAI client."""
+    response = Mock()
+    response.choices = [Mock(message=Mock(content=content))]
+    response.usage.total_tokens = total_tokens
+    return response
+
+
+class TestBenchmarks:
+    """Benchmarks for hot paths."""
+
+    @pytest.mark.parametrize(
+        "name, text",
+        [
+            ("miss", "Can you explain how list comprehensions work in Python?"),
+            ("hit", "Who created you?"),
+            ("long_miss", "Please summarize this paragraph. " * 120),
+        ],
+        ids=["miss", "hit", "long_miss"],
+    )
+    def test_check_predefined_response(
+        self, check: Callable[[str, float], None], name: str, text: str
+    ) -> None:
+        """Benchmark predefined response matching."""
+        check(
+            f"check_predefined_response[{name}]",
+            measure(lambda: check_predefined_response(text), 2000),
+        )
+
+    @pytest.mark.parametrize("size", [100, 1000, 4000])
+    def test_count_tokens(
+        self, check: Callable[[str, float], None], encoding: tiktoken.Encoding, size: int
+    ) -> None:
+        """Benchmark token counting across message sizes (up to the Telegram limit)."""
+        with patch("app.services.openai_service.settings.openai_api_key", "sk-test"):
+            service = OpenAIService()
+        text = (SAMPLE_TEXT * (size // len(SAMPLE_TEXT) + 1))[:size]
+
+        assert service.count_tokens(text, MODEL) == len(encoding.encode(text))
+        check(f"count_tokens[{size}]", measure(lambda: service.count_tokens(text, MODEL), 200))
+
+    @pytest.mark.parametrize(
+        "name, payload",
+        [
+            ("text", update_payload("Explain quantum physics in simple terms")),
+            (
+                "command",
+                update_payload("/start", [{"type": "bot_command", "offset": 0, "length": 6}]),
+            ),
+        ],
+        ids=["text", "command"],
+    )
+    def test_update_parsing(
+        self, check: Callable[[str, float], None], name: str, payload: dict[str, Any]
+    ) -> None:
+        """Benchmark Update parsing from webhook payloads (as in the webhook endpoint)."""
+        check(f"update_parsing[{name}]", measure(lambda: Update(**payload), 1000))
+
+    async def test_process_ai_message(
+        self,
+        check: Callable[[str, float], None],
+        encoding: tiktoken.Encoding,
+        test_session: AsyncSession,
+        telegram_user: TelegramUser,
+    ) -> None:
+        """Benchmark the AI message pipeline end to end with a mocked OpenAI client."""
+        message = Mock()
+        message.from_user = telegram_user
+        message.chat.id = telegram_user.id
+        message.bot.send_chat_action = AsyncMock()
+        message.reply = AsyncMock()
+
+        # Only the HTTP call is mocked: prompt assembly, token counting and
+        # the prompt cache lookup in generate_response stay in the timed path
+        client = Mock()
+        client.chat.completions.create = AsyncMock(return_value=completion("AI answer", 42))
+
+        with (
+            patch("app.services.openai_service.get_openai_client", return_value=client),
+            patch("app.services.openai_service.settings.openai_api_key", "sk-test"),
+        ):
+            seconds = await ameasure(
+                lambda: process_ai_message(message, test_session, "Explain quantum physics"), 50
+            )
+
+        assert client.chat.completions.create.await_count == 50 * ROUNDS
+        assert message.reply.await_count == 50 * ROUNDS
+        check("process_ai_message", seconds)
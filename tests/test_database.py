@@ -0,0 +1,63 @@
+"""
+Tests for cached hot-path statements.
+"""
+
+from unittest.mock import MagicMock
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import (
+    Conversation,
+    User,
+    prewarm_statements,
+    save_conversation,
+    select_user_by_telegram_id,
+)
+
+
+class TestHotStatements:
+    """Test cases for cached statements."""
+
+    async def test_lambda_statement_binds_current_value(self, test_session: AsyncSession) -> None:
+        """Test that cached statements pick up new parameter values on each call."""
+        test_session.add_all([User(telegram_id=1), User(telegram_id=2)])
+        await test_session.commit()
+
+        for telegram_id in (1, 2):
+            result = await test_session.execute(select_user_by_telegram_id(telegram_id, 0))
+            assert result.scalar_one().telegram_id == telegram_id
+
+    async def test_save_conversation(self, test_session: AsyncSession) -> None:
+        """Test that the prebuilt INSERT stores a conversation with defaults."""
+        user = User(telegram_id=3)
+        test_session.add(user)
+        await test_session.commit()
+
+        await save_conversation(
+            test_session,
+            user_id=user.id,
+            user_message="hi",
+            ai_response="hello",
+            model_used="gpt-4o",
+            tokens_used=5,
+            role_used="helpful_assistant",
+        )
+
+        conversation = (await test_session.execute(select(Conversation))).scalar_one()
+        assert conversation.ai_response == "hello"
+        assert conversation.created_at is not None
+
+    def test_prewarm_prepares_hot_selects(self) -> None:
+        """Test that a new connection runs each hot SELECT once and rolls back."""
+        dbapi_connection = MagicMock()
+        cursor = dbapi_connection.cursor.return_value
+
+        prewarm_statements(dbapi_connection, None)
+
+        queries = [call.args[0] for call in cursor.execute.call_args_list]
+        assert len(queries) == 2
+        assert "FROM users" in queries[0]
+        assert "FROM user_roles" in queries[1]
+        assert cursor.execute.call_args_list[0].args[1] == (-1, -1)
+        dbapi_connection.rollback.assert_called_once()
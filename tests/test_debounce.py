@@ -0,0 +1,84 @@
+"""
+Tests for per-chat message debouncing.
+"""
+
+import asyncio
+
+from aiogram import types
+
+from app.services.debounce import MessageDebouncer
+
+
+def make_message(message_id: int, text: str, chat_id: int = 1, user_id: int = 1) -> types.Message:
+    """Create a text message from the given user in the given chat."""
+    return types.Message(
+        message_id=message_id,
+        date=1640995200,
+        chat=types.Chat(id=chat_id, type="private" if chat_id > 0 else "group"),
+        from_user=types.User(id=user_id, is_bot=False, first_name=f"User {user_id}"),
+        text=text,
+    )
+
+
+class TestMessageDebouncer:
+    """Test cases for message debouncer."""
+
+    async def test_quick_messages_are_merged(self) -> None:
+        """Test that messages within the window produce one merged request."""
+        debouncer = MessageDebouncer(window_ms=50, max_delay_ms=1000)
+
+        leader = asyncio.create_task(debouncer.collect(make_message(1, "Hello")))
+        await asyncio.sleep(0.01)
+        follower_results = [
+            await debouncer.collect(make_message(2, "how are")),
+            await debouncer.collect(make_message(3, "you?")),
+        ]
+        latest, text = await leader
+
+        assert follower_results == [None, None]
+        assert text == "Hello\nhow are\nyou?"
+        assert latest.message_id == 3
+        assert debouncer.pending_chats == 0
+
+    async def test_chats_are_independent(self) -> None:
+        """Test that different chats are not merged."""
+        debouncer = MessageDebouncer(window_ms=20, max_delay_ms=100)
+
+        first, second = await asyncio.gather(
+            debouncer.collect(make_message(1, "one", chat_id=1)),
+            debouncer.collect(make_message(2, "two", chat_id=2)),
+        )
+
+        assert first is not None and first[1] == "one"
+        assert second is not None and second[1] == "two"
+
+    async def test_senders_in_group_chat_are_not_merged(self) -> None:
+        """Test that quick messages from two users in one group stay separate requests."""
+        debouncer = MessageDebouncer(window_ms=50, max_delay_ms=1000)
+
+        alice = asyncio.create_task(debouncer.collect(make_message(1, "hi", -100, user_id=1)))
+        bob = asyncio.create_task(debouncer.collect(make_message(2, "yo", -100, user_id=2)))
+        await asyncio.sleep(0.01)
+        merged = await debouncer.collect(make_message(3, "there", -100, user_id=1))
+
+        assert merged is None
+        alice_latest, alice_text = await alice
+        bob_latest, bob_text = await bob
+        assert (alice_latest.message_id, alice_text) == (3, "hi\nthere")
+        assert (bob_latest.message_id, bob_text) == (2, "yo")
+
+    async def test_max_delay_bounds_window(self) -> None:
+        """Test that continuous messages cannot hold the batch past max delay."""
+        debouncer = MessageDebouncer(window_ms=50, max_delay_ms=120)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+
+        leader = asyncio.create_task(debouncer.collect(make_message(1, "a")))
+        while not leader.done():
+            await asyncio.sleep(0.03)
+            if debouncer.pending_chats:
+                await debouncer.collect(make_message(2, "b"))
+        await leader
+
+        assert loop.time() - started < 0.2
+        assert not MessageDebouncer(window_ms=0).enabled
@@ -0,0 +1,88 @@
+"""
+Tests for Telegram update deduplication.
+"""
+
+import time
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock
+
+import pytest
+from aiogram.types import Update
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from app.database import ProcessedUpdate
+from app.middleware import DeduplicationMiddleware
+from app.services.dedup import UpdateDeduplicator
+
+
+class TestUpdateDeduplicator:
+    """Test cases for update id claims."""
+
+    async def test_duplicate_update_is_rejected(self) -> None:
+        """Test that the same update id is only claimed once."""
+        deduplicator = UpdateDeduplicator(ttl=60, max_size=100)
+
+        assert await deduplicator.claim(1) is True
+        assert await deduplicator.claim(1) is False
+        assert await deduplicator.claim(2) is True
+        assert deduplicator.duplicates == 1
+
+    async def test_expired_and_overflowing_ids_are_evicted(self) -> None:
+        """Test time-based and size-based eviction."""
+        deduplicator = UpdateDeduplicator(ttl=60, max_size=2)
+        for update_id in (1, 2, 3):
+            await deduplicator.claim(update_id)
+        await deduplicator.claim(4)
+        assert len(deduplicator) <= 3
+
+        deduplicator._seen[2] = time.monotonic() - 120  # Expired
+        deduplicator._seen.move_to_end(2, last=False)
+        assert await deduplicator.claim(2) is True
+
+    async def test_database_catches_duplicates_across_replicas(
+        self, test_engine: AsyncEngine
+    ) -> None:
+        """Test that a second replica sees update ids claimed by the first."""
+        factory = async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+        replica_a = UpdateDeduplicator(session_factory=factory)
+        replica_b = UpdateDeduplicator(session_factory=factory)
+
+        assert await replica_a.claim(42) is True
+        assert await replica_b.claim(42) is False
+        assert replica_b.duplicates == 1
+
+        await replica_a.forget(42)
+        assert await replica_b.claim(42) is True
+
+    async def test_cleanup_uses_database_clock(
+        self, test_engine: AsyncEngine, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that expired claims are deleted and recent ones kept, whatever the local TZ."""
+        factory = async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+        async with factory() as session:
+            old = datetime.now(UTC).replace(tzinfo=None) - timedelta(hours=2)
+            session.add(ProcessedUpdate(bot_id=0, update_id=1, created_at=old))
+            await session.commit()
+        monkeypatch.setattr("app.services.dedup.settings.dedup_cleanup_every", 1)
+        deduplicator = UpdateDeduplicator(ttl=3600, session_factory=factory)
+
+        assert await deduplicator.claim(2) is True
+
+        async with factory() as session:
+            kept = (await session.execute(select(ProcessedUpdate.update_id))).scalars().all()
+        assert kept == [2]
+
+
+class TestDeduplicationMiddleware:
+    """Test cases for deduplication middleware."""
+
+    async def test_handler_runs_once_per_update(self) -> None:
+        """Test that redelivered updates do not reach handlers."""
+        middleware = DeduplicationMiddleware(UpdateDeduplicator())
+        handler = AsyncMock(return_value="handled")
+        update = Update(update_id=7)
+
+        assert await middleware(handler, update, {}) == "handled"
+        assert await middleware(handler, update, {}) is None
+        handler.assert_awaited_once()
@@ -0,0 +1,78 @@
+"""
+Tests for streaming conversation export.
+"""
+
+import io
+import json
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import Conversation, User
+from app.export import build_query, export_jsonl, last_exported_id, parse_args, run
+
+
+async def seed_conversations(session: AsyncSession) -> None:
+    """Create two users with a few conversations each."""
+    alice = User(telegram_id=1, username="alice")
+    bob = User(telegram_id=2, username="bob")
+    session.add_all([alice, bob])
+    await session.flush()
+    for i in range(5):
+        session.add(
+            Conversation(
+                user_id=alice.id if i % 2 == 0 else bob.id,
+                user_message=f"question {i}",
+                ai_response=f"answer {i}",
+                model_used="gpt-4o" if i < 2 else "gpt-3.5-turbo",
+                tokens_used=10 + i,
+                role_used="helpful_assistant",
+            )
+        )
+    await session.commit()
+
+
+class TestExport:
+    """Test cases for conversation export."""
+
+    async def test_export_jsonl_in_batches(self, test_session: AsyncSession) -> None:
+        """Test that all rows are exported in id order across batches."""
+        await seed_conversations(test_session)
+        output = io.StringIO()
+
+        count, last_id = await export_jsonl(test_session, build_query(), output, batch_size=2)
+
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert count == 5
+        assert [r["user_message"] for r in records] == [f"question {i}" for i in range(5)]
+        assert last_id == records[-1]["id"]
+        assert records[0]["telegram_id"] == 1
+
+    async def test_export_filters(self, test_session: AsyncSession) -> None:
+        """Test filtering by Telegram user and model."""
+        await seed_conversations(test_session)
+        output = io.StringIO()
+
+        count, _ = await export_jsonl(
+            test_session, build_query(telegram_id=1, model="gpt-3.5-turbo"), output, 100
+        )
+
+        assert count == 2  # questions 2 and 4
+
+    async def test_resume_appends_after_last_id(
+        self, test_session: AsyncSession, tmp_path: Path
+    ) -> None:
+        """Test that --resume continues after the last exported id."""
+        await seed_conversations(test_session)
+        path = tmp_path / "export.jsonl"
+
+        first = await run(parse_args([str(path), "--model", "gpt-4o"]), test_session)
+        assert first[0] == 2
+        assert last_exported_id(path) == first[1]
+
+        second = await run(parse_args([str(path), "--resume"]), test_session)
+
+        lines = path.read_text().splitlines()
+        assert second[0] == 3
+        assert len(lines) == 5
+        assert len({json.loads(line)["id"] for line in lines}) == 5
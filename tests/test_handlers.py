@@ -2,9 +2,11 @@
 Tests for bot handlers.
 """
 
+from typing import Any
+
 from aiogram.types import User as TelegramUser
 from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 
 from app.database import User
 from app.handlers import start_handler
@@ -103,3 +105,102 @@ class TestStartHandler:
         greeting_text = message.answer.call_args[0][0]
         assert "Hello!" in greeting_text
         assert "Unknown" in greeting_text
+
+
+class TestProcessAIMessage:
+    """Test cases for AI message pipeline."""
+
+    async def test_process_ai_message_replies_then_persists(
+        self, test_session: AsyncSession, telegram_user: TelegramUser
+    ) -> None:
+        """Test that AI reply is sent and conversation saved afterwards."""
+        from unittest.mock import AsyncMock, Mock, patch
+
+        from app.database import Conversation
+        from app.handlers import process_ai_message
+
+        message = Mock()
+        message.from_user = telegram_user
+        message.chat.id = telegram_user.id
+        message.bot.send_chat_action = AsyncMock()
+        message.reply = AsyncMock()
+
+        service = Mock()
+        service.generate_response = AsyncMock(return_value=("AI answer", 42))
+
+        with patch("app.handlers.OpenAIService", return_value=service):
+            await process_ai_message(message, test_session, "Explain quantum physics")
+
+        message.reply.assert_called_once()
+        assert message.reply.call_args[0][0] == "AI answer"
+        message.bot.send_chat_action.assert_awaited()
+
+        result = await test_session.execute(select(Conversation))
+        conversation = result.scalar_one()
+        assert conversation.user_message == "Explain quantum physics"
+        assert conversation.ai_response == "AI answer"
+        assert conversation.tokens_used == 42
+
+    async def test_process_ai_message_service_error(
+        self, test_session: AsyncSession, telegram_user: TelegramUser
+    ) -> None:
+        """Test that service errors are reported and nothing is persisted."""
+        from unittest.mock import AsyncMock, Mock, patch
+
+        from app.database import Conversation
+        from app.handlers import process_ai_message
+
+        message = Mock()
+        message.from_user = telegram_user
+        message.chat.id = telegram_user.id
+        message.bot.send_chat_action = AsyncMock()
+        message.reply = AsyncMock()
+
+        service = Mock()
+        service.generate_response = AsyncMock(side_effect=ValueError("AI is down"))
+
+        with patch("app.handlers.OpenAIService", return_value=service):
+            await process_ai_message(message, test_session, "Hello there")
+
+        assert "AI is down" in message.reply.call_args[0][0]
+        result = await test_session.execute(select(Conversation))
+        assert result.scalar_one_or_none() is None
+
+    async def test_process_ai_message_persist_failure_is_not_reported(
+        self, test_engine: AsyncEngine, telegram_user: TelegramUser
+    ) -> None:
+        """Test that a failed save is rolled back and the update still completes cleanly."""
+        from unittest.mock import AsyncMock, Mock, patch
+
+        from app.database import save_conversation
+        from app.handlers import process_ai_message
+        from app.middleware import DatabaseMiddleware
+
+        message = Mock()
+        message.from_user = telegram_user
+        message.chat.id = telegram_user.id
+        message.bot.send_chat_action = AsyncMock()
+        message.reply = AsyncMock()
+
+        service = Mock()
+        service.generate_response = AsyncMock(return_value=("AI answer", 42))
+
+        async def save_on_dropped_connection(session: AsyncSession, **values: Any) -> None:
+            # The database connection breaks right before the insert
+            await (await session.connection()).invalidate()
+            await save_conversation(session, **values)
+
+        async def handler(event: Any, data: dict[str, Any]) -> None:
+            await process_ai_message(message, data["session"], "Explain quantum physics")
+
+        session_factory = async_sessionmaker(test_engine, expire_on_commit=False)
+        with (
+            patch("app.middleware.AsyncSessionLocal", session_factory),
+            patch("app.handlers.OpenAIService", return_value=service),
+            patch("app.handlers.save_conversation", save_on_dropped_connection),
+        ):
+            # Must not raise, or the update would be forgotten and redelivered
+            await DatabaseMiddleware()(handler, message, {})
+
+        message.reply.assert_awaited_once()
+        assert message.reply.call_args[0][0] == "AI answer"
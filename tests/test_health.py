@@ -0,0 +1,121 @@
+"""
+Tests for liveness and readiness probes.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+from app.health import HealthProbe, create_health_app
+from app.shutdown import ShutdownCoordinator
+
+
+def make_probe(test_engine: AsyncEngine, bot: Mock, timeout: float = 1.0) -> HealthProbe:
+    """Create probe wired to the test database without starting the background task."""
+    probe = HealthProbe(interval=60, timeout=timeout)
+    probe.session_factory = async_sessionmaker(test_engine)
+    probe.bots = [bot]
+    return probe
+
+
+def client_for(probe: HealthProbe, coordinator: ShutdownCoordinator) -> AsyncClient:
+    """HTTP client for the probe-only app."""
+    app = create_health_app(probe, coordinator)
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+
+class TestHealthProbe:
+    """Test cases for the background health probe."""
+
+    async def test_refresh_reports_healthy_dependencies(self, test_engine: AsyncEngine) -> None:
+        """Test that reachable database and Bot API make the report ready."""
+        bot = Mock(get_me=AsyncMock())
+        probe = make_probe(test_engine, bot)
+
+        report = await probe.refresh()
+
+        assert report.checks["database"] == "healthy"
+        assert report.checks["bot_api"] == "healthy"
+        assert report.ready
+        bot.get_me.assert_awaited_once()
+
+    async def test_refresh_times_out_slow_bot_api(self, test_engine: AsyncEngine) -> None:
+        """Test that a hanging Bot API call is reported unhealthy after the timeout."""
+
+        async def hang() -> None:
+            await asyncio.sleep(10)
+
+        bot = Mock(get_me=hang)
+        probe = make_probe(test_engine, bot, timeout=0.05)
+
+        report = await probe.refresh()
+
+        assert report.checks["database"] == "healthy"
+        assert report.checks["bot_api"] == "unhealthy"
+        assert not report.ready
+
+    async def test_endpoints_serve_cached_report(self, test_engine: AsyncEngine) -> None:
+        """Test that endpoints reflect the last probe without probing themselves."""
+        bot = Mock(get_me=AsyncMock())
+        probe = make_probe(test_engine, bot)
+        coordinator = ShutdownCoordinator()
+
+        async with client_for(probe, coordinator) as client:
+            # No probe has run yet
+            assert (await client.get("/ready")).status_code == 503
+
+            await probe.refresh()
+            health = await client.get("/health")
+            ready = await client.get("/ready")
+            await client.get("/ready")
+
+        assert health.status_code == 200
+        data = health.json()
+        assert data["status"] == "healthy"
+        assert data["checks"]["database"] == "healthy"
+        assert "response_time_ms" in data
+        assert ready.status_code == 200
+        bot.get_me.assert_awaited_once()
+
+    async def test_unreachable_dependency_keeps_process_live(
+        self, test_engine: AsyncEngine
+    ) -> None:
+        """Test that a failing Bot API fails readiness but not liveness."""
+        bot = Mock(get_me=AsyncMock(side_effect=ConnectionError("unreachable")))
+        probe = make_probe(test_engine, bot)
+        await probe.refresh()
+
+        async with client_for(probe, ShutdownCoordinator()) as client:
+            health = await client.get("/health")
+            ready = await client.get("/ready")
+
+        assert health.status_code == 200
+        assert health.json()["status"] == "degraded"
+        assert ready.status_code == 503
+        assert ready.json()["checks"]["bot_api"] == "unhealthy"
+
+    async def test_not_ready_while_shutting_down(self, test_engine: AsyncEngine) -> None:
+        """Test that readiness fails once shutdown is requested."""
+        probe = make_probe(test_engine, Mock(get_me=AsyncMock()))
+        await probe.refresh()
+        coordinator = ShutdownCoordinator()
+        coordinator.request_shutdown()
+
+        async with client_for(probe, coordinator) as client:
+            ready = await client.get("/ready")
+
+        assert ready.status_code == 503
+        assert ready.json()["status"] == "shutting_down"
+
+    async def test_stale_report_fails_liveness(self, test_engine: AsyncEngine) -> None:
+        """Test that liveness fails when the probe stops refreshing."""
+        probe = make_probe(test_engine, Mock(get_me=AsyncMock()))
+        await probe.refresh()
+        probe._updated_at -= 3 * probe.interval + probe.timeout + 1
+
+        async with client_for(probe, ShutdownCoordinator()) as client:
+            health = await client.get("/health")
+
+        assert health.status_code == 503
@@ -0,0 +1,154 @@
+"""
+Tests for /history keyset pagination.
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, Mock
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import Conversation, User
+from app.handlers import history_callback_handler
+from app.services.history import HistoryCallback, fetch_page
+
+
+async def seed(session: AsyncSession, count: int) -> User:
+    """Create a user with `count` conversations, some sharing a timestamp."""
+    user = User(telegram_id=123456789, username="testuser")
+    other = User(telegram_id=2, username="other")
+    session.add_all([user, other])
+    await session.flush()
+
+    start = datetime(2025, 1, 1, 12, 0, 0)
+    for i in range(count):
+        session.add(
+            Conversation(
+                user_id=user.id,
+                user_message=f"question {i}",
+                ai_response=f"answer {i} " + "x" * 200,
+                model_used="gpt-4o",
+                tokens_used=1,
+                role_used="helpful_assistant",
+                # Pairs of conversations share created_at; id breaks the tie
+                created_at=start + timedelta(minutes=i // 2),
+            )
+        )
+    session.add(
+        Conversation(
+            user_id=other.id,
+            user_message="not mine",
+            ai_response="not mine",
+            model_used="gpt-4o",
+            tokens_used=1,
+            role_used="helpful_assistant",
+            created_at=start,
+        )
+    )
+    await session.commit()
+    return user
+
+
+def questions(page) -> list[str]:
+    """Question previews on a page."""
+    return [entry.question for entry in page.entries]
+
+
+class TestHistoryPagination:
+    """Test cases for history paging."""
+
+    async def test_pages_cover_all_conversations_in_order(self, test_session: AsyncSession) -> None:
+        """Test that paging older visits every conversation exactly once, newest first."""
+        user = await seed(test_session, 11)
+
+        page = await fetch_page(test_session, user.id, page_size=4)
+        seen = questions(page)
+        assert not page.has_newer
+        while page.has_older:
+            page = await fetch_page(
+                test_session, user.id, cursor=page.entries[-1].cursor, page_size=4
+            )
+            assert page.has_newer
+            seen += questions(page)
+
+        assert seen == [f"question {i}" for i in reversed(range(11))]
+
+    async def test_paging_newer_returns_previous_page(self, test_session: AsyncSession) -> None:
+        """Test that going back from the second page returns the first page."""
+        user = await seed(test_session, 9)
+
+        first = await fetch_page(test_session, user.id, page_size=3)
+        second = await fetch_page(
+            test_session, user.id, cursor=first.entries[-1].cursor, page_size=3
+        )
+        back = await fetch_page(
+            test_session, user.id, cursor=second.entries[0].cursor, newer=True, page_size=3
+        )
+
+        assert questions(back) == questions(first)
+        assert not back.has_newer
+        assert back.has_older
+
+    async def test_previews_are_truncated(self, test_session: AsyncSession) -> None:
+        """Test that pages carry shortened responses only."""
+        user = await seed(test_session, 1)
+
+        page = await fetch_page(test_session, user.id)
+
+        assert page.entries[0].answer.endswith("…")
+        assert len(page.entries[0].answer) <= 80
+
+    async def test_page_query_uses_composite_index(self, test_session: AsyncSession) -> None:
+        """Test that deep pages seek through the (user_id, created_at, id) index."""
+        user = await seed(test_session, 4)
+        plan = await test_session.execute(
+            text(
+                "EXPLAIN QUERY PLAN SELECT id FROM conversations "
+                "WHERE user_id = :user_id AND (created_at, id) < (:ts, :id) "
+                "ORDER BY created_at DESC, id DESC LIMIT 6"
+            ),
+            {"user_id": user.id, "ts": "2025-01-01 12:01:00.000000", "id": 3},
+        )
+        details = " ".join(str(row[-1]) for row in plan)
+        assert "ix_conversations_user_created_id" in details
+        assert "TEMP B-TREE" not in details
+
+    def test_keyboard_callback_data_fits_telegram_limit(self) -> None:
+        """Test that cursor callback data stays within Telegram's 64 bytes."""
+        callback = HistoryCallback(action="older", ts=2**62, id=2**62)
+        assert len(callback.pack().encode()) <= 64
+
+
+class TestHistoryHandlers:
+    """Test cases for /history callbacks."""
+
+    async def test_show_sends_full_response(self, test_session: AsyncSession) -> None:
+        """Test that the show button sends the complete stored response."""
+        user = await seed(test_session, 2)
+        page = await fetch_page(test_session, user.id)
+
+        callback = Mock()
+        callback.from_user.id = user.telegram_id
+        callback.message.answer = AsyncMock()
+        callback.answer = AsyncMock()
+
+        await history_callback_handler(
+            callback, HistoryCallback(action="show", id=page.entries[0].id), test_session
+        )
+
+        assert callback.message.answer.call_args[0][0] == "answer 1 " + "x" * 200
+
+    async def test_show_hides_other_users_conversations(self, test_session: AsyncSession) -> None:
+        """Test that a forged id for another user's conversation is refused."""
+        await seed(test_session, 1)
+
+        callback = Mock()
+        callback.from_user.id = 123456789
+        callback.message.answer = AsyncMock()
+        callback.answer = AsyncMock()
+
+        # The other user's conversation is the last one inserted
+        await history_callback_handler(callback, HistoryCallback(action="show", id=2), test_session)
+
+        callback.message.answer.assert_not_called()
+        callback.answer.assert_awaited_once_with("Conversation not found")
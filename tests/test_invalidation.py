@@ -0,0 +1,180 @@
+"""
+Tests for cross-replica cache invalidation.
+
+A small in-process stand-in replaces PostgreSQL: it broadcasts pg_notify()
+payloads to every connection listening on the channel.
+"""
+
+import asyncio
+from collections.abc import Callable
+from typing import Any
+
+from app.services.invalidation import InvalidationBus, asyncpg_dsn
+
+
+class FakePostgres:
+    """Minimal LISTEN/NOTIFY server stand-in."""
+
+    def __init__(self) -> None:
+        self.connections: list[FakeConnection] = []
+        self.available = True
+
+    async def connect(self, dsn: str) -> "FakeConnection":
+        if not self.available:
+            raise OSError("connection refused")
+        connection = FakeConnection(self)
+        self.connections.append(connection)
+        return connection
+
+    def notify(self, channel: str, payload: str) -> None:
+        for connection in self.connections:
+            for callback in connection.listeners.get(channel, []):
+                callback(connection, 1, channel, payload)
+
+    def drop_all(self) -> None:
+        """Simulate a network gap: terminate every connection."""
+        for connection in list(self.connections):
+            connection.terminate()
+
+
+class FakeConnection:
+    """Stand-in for asyncpg.Connection."""
+
+    def __init__(self, server: FakePostgres) -> None:
+        self.server = server
+        self.listeners: dict[str, list[Callable[..., None]]] = {}
+        self.termination_listeners: list[Callable[[Any], None]] = []
+        self.closed = False
+        self.hung = False  # Queries never answer, as on a half-open TCP connection
+
+    async def add_listener(self, channel: str, callback: Callable[..., None]) -> None:
+        self.listeners.setdefault(channel, []).append(callback)
+
+    def add_termination_listener(self, callback: Callable[[Any], None]) -> None:
+        self.termination_listeners.append(callback)
+
+    async def execute(self, query: str, *args: Any, timeout: float | None = None) -> None:
+        if self.hung:
+            await asyncio.wait_for(asyncio.Event().wait(), timeout)
+        if self.closed:
+            raise OSError("connection is closed")
+        if "pg_notify" in query:
+            self.server.notify(*args)
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+    async def close(self, timeout: float | None = None) -> None:
+        self.terminate()
+
+    def terminate(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self.server.connections.remove(self)
+        for callback in self.termination_listeners:
+            callback(self)
+
+
+def make_bus(server: FakePostgres) -> InvalidationBus:
+    """Create an enabled bus connected to the stand-in server."""
+    return InvalidationBus(
+        dsn="postgresql://test", connect=server.connect, reconnect_delay=0.01, enabled=True
+    )
+
+
+class TestInvalidationBus:
+    """Test cases for LISTEN/NOTIFY invalidation bus."""
+
+    def test_asyncpg_dsn_strips_driver(self) -> None:
+        """Test that SQLAlchemy driver suffix is removed for asyncpg."""
+        dsn = asyncpg_dsn("postgresql+asyncpg://user:secret@db:5432/bot")
+        assert dsn == "postgresql://user:secret@db:5432/bot"
+
+    async def test_publish_evicts_on_other_replica(self) -> None:
+        """Test that keyed invalidations reach subscribers on other replicas once."""
+        server = FakePostgres()
+        publisher, subscriber = make_bus(server), make_bus(server)
+        local: list[str | None] = []
+        remote: list[str | None] = []
+        publisher.subscribe("roles", local.append)
+        subscriber.subscribe("roles", remote.append)
+
+        publisher.start()
+        subscriber.start()
+        try:
+            await publisher.wait_connected(timeout=1)
+            await subscriber.wait_connected(timeout=1)
+
+            await publisher.publish("roles", "3")
+
+            assert local == ["3"]  # Applied locally, own notification ignored
+            assert remote == ["3"]
+            assert subscriber.received == 1
+        finally:
+            await publisher.stop()
+            await subscriber.stop()
+
+    async def test_reconnect_flushes_all(self) -> None:
+        """Test that the listener reconnects and flushes caches after a gap."""
+        server = FakePostgres()
+        bus = make_bus(server)
+        flushed: list[str | None] = []
+        bus.subscribe("roles", flushed.append)
+
+        bus.start()
+        try:
+            await bus.wait_connected(timeout=1)
+            server.available = False
+            server.drop_all()
+            await asyncio.sleep(0.05)
+            assert flushed == []
+
+            server.available = True
+            await bus.wait_connected(timeout=1)
+
+            assert flushed == [None]
+            assert bus.reconnects == 1
+        finally:
+            await bus.stop()
+
+    async def test_hung_connection_times_out_and_reconnects(self) -> None:
+        """Test that a keepalive query that never returns is treated as a lost connection."""
+        server = FakePostgres()
+        bus = InvalidationBus(
+            dsn="postgresql://test",
+            connect=server.connect,
+            keepalive=0.02,
+            reconnect_delay=0.01,
+            enabled=True,
+        )
+        flushed: list[str | None] = []
+        bus.subscribe("roles", flushed.append)
+
+        bus.start()
+        try:
+            await bus.wait_connected(timeout=1)
+            hung = server.connections[0]
+            hung.hung = True
+
+            async with asyncio.timeout(1):
+                while bus.reconnects == 0:
+                    await asyncio.sleep(0.005)
+
+            assert hung.closed
+            assert flushed == [None]
+        finally:
+            await bus.stop()
+
+    async def test_disabled_bus_only_applies_locally(self) -> None:
+        """Test that a disabled bus never connects but still evicts locally."""
+        server = FakePostgres()
+        bus = InvalidationBus(dsn="postgresql://test", connect=server.connect, enabled=False)
+        evicted: list[str | None] = []
+        bus.subscribe("roles", evicted.append)
+
+        bus.start()
+        await bus.publish("roles", "1")
+
+        assert evicted == ["1"]
+        assert server.connections == []
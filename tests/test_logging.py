@@ -0,0 +1,170 @@
+"""
+Tests for queued structured logging.
+"""
+
+import json
+import logging
+import queue
+from collections.abc import Generator
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from aiogram.types import Update
+
+from app.logging_setup import (
+    SAMPLED,
+    CorrelationFilter,
+    JsonFormatter,
+    NonBlockingQueueHandler,
+    SamplingFilter,
+    correlation_id,
+    dropped_records,
+    setup_logging,
+)
+from app.metrics import read_gauges
+from app.middleware import CorrelationMiddleware
+
+
+def make_record(
+    msg: str, *args: object, level: int = logging.INFO, **extra: object
+) -> logging.LogRecord:
+    """Create a record as a logger call would."""
+    record = logging.LogRecord("app.test", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+@pytest.fixture
+def restore_root_logger() -> Generator[None, None, None]:
+    """Put back root handlers and level replaced by setup_logging()."""
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+class TestFormatting:
+    """Test cases for record preparation and JSON output."""
+
+    def test_json_formatter_renders_lazy_args(self) -> None:
+        """Test that %-style args are rendered by the formatter with the correlation id."""
+        record = make_record("Sent %s tokens to %s", 42, 7, correlation_id="1:100")
+
+        entry = json.loads(JsonFormatter().format(record))
+
+        assert entry["msg"] == "Sent 42 tokens to 7"
+        assert entry["level"] == "INFO"
+        assert entry["logger"] == "app.test"
+        assert entry["correlation_id"] == "1:100"
+
+    def test_prepare_keeps_immutable_args_unformatted(self) -> None:
+        """Test that only mutable args are stringified before crossing threads."""
+        handler = NonBlockingQueueHandler(queue.Queue())
+        record = make_record("%s %s", 42, ["list"])
+
+        prepared = handler.prepare(record)
+
+        assert prepared.msg == "%s %s"
+        assert prepared.args == (42, "['list']")
+
+    def test_full_queue_drops_records(self) -> None:
+        """Test that a full queue drops records instead of blocking the caller."""
+        handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+
+        handler.handle(make_record("first"))
+        handler.handle(make_record("second"))
+
+        assert handler.queue.qsize() == 1
+        assert handler.dropped == 1
+
+    def test_setup_logging_writes_json_through_listener(
+        self, restore_root_logger: None, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        """Test that records are written by the listener thread as JSON lines."""
+        listener = setup_logging(level="INFO", log_format="json", sample_rate=1.0, queue_size=100)
+        token = correlation_id.set("5:6")
+        try:
+            logging.getLogger("app.test").info("Hello %s", "world")
+        finally:
+            correlation_id.reset(token)
+            listener.stop()
+
+        entry = json.loads(capsys.readouterr().err.strip().splitlines()[-1])
+        assert entry["msg"] == "Hello world"
+        assert entry["correlation_id"] == "5:6"
+
+    def test_queue_size_and_drops_are_reported_as_gauges(self, restore_root_logger: None) -> None:
+        """Test that the log queue and dropped records show up in the gauges."""
+        listener = setup_logging(level="INFO", log_format="json", sample_rate=1.0, queue_size=100)
+        listener.stop()  # Nothing drains the queue now
+        try:
+            for i in range(150):
+                logging.getLogger("app.test").info("line %s", i)
+
+            gauges = read_gauges()
+        finally:
+            logging.getLogger().handlers.clear()
+
+        assert gauges["log_queue"] == 100
+        assert gauges["log_records_dropped"] == 50
+        assert dropped_records() == 50
+
+
+class TestSampling:
+    """Test cases for per-update sampling."""
+
+    def sampled(self, sampler: SamplingFilter, correlation: str, level: int = logging.INFO) -> bool:
+        """Run a sampled record through correlation and sampling filters."""
+        token = correlation_id.set(correlation)
+        try:
+            record = make_record("line", level=level, **SAMPLED)
+            CorrelationFilter().filter(record)
+            return sampler.filter(record)
+        finally:
+            correlation_id.reset(token)
+
+    def test_decision_is_stable_per_update(self) -> None:
+        """Test that all sampled lines of one update are kept or dropped together."""
+        sampler = SamplingFilter(0.5)
+        decisions = {self.sampled(sampler, f"1:{update_id}") for update_id in range(200)}
+
+        assert decisions == {True, False}
+        for update_id in range(50):
+            first = self.sampled(sampler, f"1:{update_id}")
+            assert self.sampled(sampler, f"1:{update_id}") is first
+
+    def test_rate_bounds(self) -> None:
+        """Test that rate 1 keeps and rate 0 drops every sampled line."""
+        assert all(self.sampled(SamplingFilter(1.0), f"1:{i}") for i in range(50))
+        assert not any(self.sampled(SamplingFilter(0.0), f"1:{i}") for i in range(50))
+
+    def test_warnings_and_unsampled_lines_are_kept(self) -> None:
+        """Test that warnings and lines without the sampled flag bypass sampling."""
+        sampler = SamplingFilter(0.0)
+
+        assert self.sampled(sampler, "1:1", level=logging.WARNING)
+        assert sampler.filter(make_record("plain"))
+
+
+class TestCorrelationMiddleware:
+    """Test cases for correlation id propagation."""
+
+    async def test_sets_id_during_handler_and_resets(self) -> None:
+        """Test that the id is <bot id>:<update id> inside the handler only."""
+        seen: list[str] = []
+
+        async def handler(event: Update, data: dict[str, object]) -> None:
+            seen.append(correlation_id.get())
+
+        await CorrelationMiddleware()(handler, Update(update_id=77), {"bot": Mock(id=5)})
+
+        assert seen == ["5:77"]
+        assert correlation_id.get() == "-"
+
+    async def test_passes_through_other_events(self) -> None:
+        """Test that non-update events are handled without a correlation id."""
+        handler = AsyncMock(return_value="done")
+
+        assert await CorrelationMiddleware()(handler, Mock(), {}) == "done"
+        assert correlation_id.get() == "-"
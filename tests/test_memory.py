@@ -0,0 +1,69 @@
+"""
+Tests for memory observability.
+"""
+
+import logging
+import tracemalloc
+
+import pytest
+
+from app.memory import MemoryMonitor, collect_memory_stats
+from app.metrics import gauges, register_gauge
+
+
+class TestMemoryMonitor:
+    """Test cases for memory monitor."""
+
+    def test_stats_include_rss_and_gauges(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that stats report RSS and registered subsystem gauges."""
+        monkeypatch.setattr("app.metrics.gauges", dict(gauges))
+        register_gauge("test_queue", lambda: 3)
+        register_gauge("broken_cache", lambda: 1 // 0)
+
+        stats = collect_memory_stats()
+
+        assert stats.rss_bytes > 0
+        assert stats.gauges["test_queue"] == 3
+        assert "broken_cache" not in stats.gauges
+        assert "test_queue=3" in stats.format()
+
+    def test_warns_near_container_limit(
+        self, monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+    ) -> None:
+        """Test that a warning is logged above the configured limit fraction."""
+        monkeypatch.setattr("app.memory.get_rss_bytes", lambda: 120 * 2**20)
+        monkeypatch.setattr("app.memory.get_cgroup_limit_bytes", lambda: 128 * 2**20)
+        monitor = MemoryMonitor(interval=0, warn_fraction=0.9)
+
+        with caplog.at_level(logging.INFO, logger="app.memory"):
+            stats = monitor.check()
+
+        assert stats.limit_fraction == pytest.approx(120 / 128)
+        assert any(record.levelno == logging.WARNING for record in caplog.records)
+
+    def test_snapshot_diff_against_baseline(self) -> None:
+        """Test that first call captures baseline and second reports growth."""
+        monitor = MemoryMonitor(interval=0)
+        try:
+            assert monitor.snapshot_diff() == []
+            retained = [bytearray(1024) for _ in range(200)]
+            sites = monitor.snapshot_diff(limit=5)
+            assert sites
+            assert any("test_memory.py" in site for site in sites)
+            del retained
+        finally:
+            tracemalloc.stop()
+
+    def test_stop_tracing_ends_tracemalloc(self) -> None:
+        """Test that stopping tracing turns tracemalloc off and forgets the baseline."""
+        monitor = MemoryMonitor(interval=0)
+        try:
+            monitor.reset_baseline()
+            assert tracemalloc.is_tracing()
+
+            monitor.stop_tracing()
+
+            assert not tracemalloc.is_tracing()
+            assert monitor.snapshot_diff() == []  # Starts over with a fresh baseline
+        finally:
+            tracemalloc.stop()
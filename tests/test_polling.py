@@ -0,0 +1,158 @@
+"""
+Tests for the polling engine.
+"""
+
+import asyncio
+from typing import Any
+from unittest.mock import Mock
+
+import pytest
+from aiogram import Dispatcher
+from aiogram.methods import GetUpdates
+from aiogram.types import Update
+from aiogram.utils.backoff import BackoffConfig
+
+from app.handlers import router
+from app.polling import PollingEngine
+
+FAST_BACKOFF = BackoffConfig(min_delay=0.01, max_delay=0.02, factor=1.1, jitter=0.0)
+
+
+class FakeBot:
+    """Bot stand-in answering getUpdates from queued batches, then long-polling forever."""
+
+    def __init__(self, *batches: list[Update] | Exception) -> None:
+        self.id = 1
+        self.session = Mock(timeout=None)
+        self.batches = list(batches)
+        self.calls: list[GetUpdates] = []
+
+    async def __call__(self, method: GetUpdates, request_timeout: int | None = None) -> Any:
+        self.calls.append(method)
+        if not self.batches:
+            await asyncio.Event().wait()
+        batch = self.batches.pop(0)
+        if isinstance(batch, Exception):
+            raise batch
+        return batch
+
+
+def updates(*ids: int) -> list[Update]:
+    """Batch of empty updates with the given ids."""
+    return [Update(update_id=update_id) for update_id in ids]
+
+
+class BlockingDispatcher:
+    """Dispatcher stand-in whose handlers wait until released."""
+
+    def __init__(self) -> None:
+        self.release = asyncio.Event()
+        self.running = 0
+        self.max_running = 0
+        self.handled: list[int] = []
+
+    def resolve_used_update_types(self) -> list[str]:
+        return ["message"]
+
+    async def feed_update(self, bot: FakeBot, update: Update) -> None:
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await self.release.wait()
+        self.running -= 1
+        self.handled.append(update.update_id)
+
+
+async def wait_for(condition: Any, timeout: float = 1.0) -> None:
+    """Poll `condition` until it is true."""
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.001)
+
+
+async def stop(task: asyncio.Task[None]) -> None:
+    """Cancel the polling task."""
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+
+class TestPollingEngine:
+    """Test cases for bounded concurrent polling."""
+
+    async def test_concurrency_is_bounded_and_backlog_reported(self) -> None:
+        """Test that at most max_concurrency handlers run while the rest wait as backlog."""
+        dispatcher = BlockingDispatcher()
+        bot = FakeBot(updates(1, 2, 3, 4, 5))
+        engine = PollingEngine(dispatcher, max_concurrency=2, timeout=10, limit=50)
+        task = asyncio.create_task(engine.run(bot))
+
+        await wait_for(lambda: dispatcher.running == 2)
+        assert engine.active == 2
+        assert engine.backlog == 3
+        assert len(bot.calls) == 1  # No new fetch while the batch is not dispatched
+
+        dispatcher.release.set()
+        await wait_for(lambda: len(dispatcher.handled) == 5)
+        await wait_for(lambda: len(bot.calls) == 2)
+
+        assert dispatcher.max_running == 2
+        assert engine.backlog == 0
+        await stop(task)
+
+    async def test_requests_use_offset_limit_and_allowed_updates(self) -> None:
+        """Test that getUpdates confirms the previous batch and carries tuned parameters."""
+        dispatcher = BlockingDispatcher()
+        dispatcher.release.set()
+        bot = FakeBot(updates(10, 11), [])
+        engine = PollingEngine(dispatcher, max_concurrency=4, timeout=25, limit=20)
+        task = asyncio.create_task(engine.run(bot))
+
+        await wait_for(lambda: len(bot.calls) == 3)
+
+        first, second, third = bot.calls
+        assert first.offset is None
+        assert second.offset == 12
+        assert third.offset == 12
+        assert (second.limit, second.timeout, second.allowed_updates) == (20, 25, ["message"])
+        assert engine.fetch_stats.count == 1  # The empty batch is not timed
+        await stop(task)
+
+    async def test_fetch_errors_back_off_and_retry(self) -> None:
+        """Test that a failed fetch is counted and retried."""
+        dispatcher = BlockingDispatcher()
+        dispatcher.release.set()
+        bot = FakeBot(RuntimeError("network down"), updates(1))
+        engine = PollingEngine(dispatcher, backoff_config=FAST_BACKOFF)
+        task = asyncio.create_task(engine.run(bot))
+
+        await wait_for(lambda: dispatcher.handled == [1])
+
+        assert engine.fetch_errors == 1
+        await stop(task)
+
+    async def test_confirm_acknowledges_only_dispatched_updates(self) -> None:
+        """Test that updates still waiting for a slot at shutdown stay unconfirmed."""
+        dispatcher = BlockingDispatcher()
+        bot = FakeBot(updates(1, 2, 3, 4, 5))
+        engine = PollingEngine(dispatcher, max_concurrency=2)
+        task = asyncio.create_task(engine.run(bot))
+        await wait_for(lambda: dispatcher.running == 2)
+
+        await stop(task)
+        bot.batches = [[]]
+        await engine.confirm(bot)
+
+        # Updates 1 and 2 were dispatched; 3-5 are redelivered on the next start
+        assert bot.calls[-1].offset == 3
+        assert engine.backlog == 0
+        dispatcher.release.set()
+        await wait_for(lambda: engine.active == 0)
+
+    def test_allowed_updates_default_to_handled_types(self) -> None:
+        """Test that only update types with registered handlers are requested."""
+        dispatcher = Dispatcher()
+        dispatcher.include_router(router)
+
+        engine = PollingEngine(dispatcher)
+
+        assert set(engine.allowed_updates) == {"message", "callback_query"}
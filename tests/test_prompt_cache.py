@@ -0,0 +1,93 @@
+"""
+Tests for near-duplicate prompt cache.
+"""
+
+from app.services.prompt_cache import PromptCache, normalize_prompt
+
+ROLE = "You are a helpful AI assistant."
+MODEL = "gpt-3.5-turbo"
+
+
+class TestPromptCache:
+    """Test cases for MinHash prompt cache."""
+
+    def test_normalize_prompt(self) -> None:
+        """Test that casing, punctuation and whitespace are ignored."""
+        assert normalize_prompt("  What IS   Python?! ") == "what is python"
+
+    def test_near_duplicate_prompt_hits(self) -> None:
+        """Test that a prompt differing by punctuation and casing reuses the answer."""
+        cache = PromptCache(max_entries=100, max_bytes=2**20)
+        cache.put("How do I reverse a list in Python?", ROLE, MODEL, "Use reversed()")
+
+        hit = cache.get("how do i reverse a list in python", ROLE, MODEL, threshold=0.9)
+
+        assert hit is not None
+        assert hit[0] == "Use reversed()"
+        assert cache.hits == 1
+
+    def test_different_prompt_or_role_misses(self) -> None:
+        """Test that unrelated prompts and other roles do not hit."""
+        cache = PromptCache(max_entries=100, max_bytes=2**20)
+        cache.put("How do I reverse a list in Python?", ROLE, MODEL, "Use reversed()")
+
+        assert cache.get("What is the capital of France?", ROLE, MODEL, threshold=0.9) is None
+        assert cache.get("How do I reverse a list in Python?", "Be rude.", MODEL, 0.9) is None
+
+    def test_other_bots_miss(self) -> None:
+        """Test that an answer cached for one bot is never served to another."""
+        cache = PromptCache(max_entries=100, max_bytes=2**20)
+        cache.put("How do I reverse a list in Python?", ROLE, MODEL, "Use reversed()", bot_id=1)
+
+        assert cache.get("How do I reverse a list in Python?", ROLE, MODEL, 0.9, bot_id=2) is None
+        assert cache.get("How do I reverse a list in Python?", ROLE, MODEL, 0.9, bot_id=1)
+
+    def test_lru_eviction_respects_entry_cap(self) -> None:
+        """Test that least recently used prompts are evicted when full."""
+        cache = PromptCache(max_entries=2, max_bytes=2**20)
+        cache.put("first question about databases", ROLE, MODEL, "one")
+        cache.put("second question about networking", ROLE, MODEL, "two")
+        assert cache.get("first question about databases", ROLE, MODEL, 0.9) is not None
+
+        cache.put("third question about compilers", ROLE, MODEL, "three")
+
+        assert len(cache) == 2
+        assert cache.get("second question about networking", ROLE, MODEL, 0.9) is None
+        assert cache.get("first question about databases", ROLE, MODEL, 0.9) is not None
+
+    def test_memory_cap_evicts_large_responses(self) -> None:
+        """Test that cached response bytes stay under the memory cap."""
+        cache = PromptCache(max_entries=10, max_bytes=10 * 64 * 4 + 1500)
+        for i in range(5):
+            cache.put(f"question number {i} about memory limits", ROLE, MODEL, "x" * 1000)
+
+        assert cache.memory_bytes <= cache.max_bytes
+        assert len(cache) == 1
+
+    async def test_generate_response_does_not_share_answers_between_bots(self) -> None:
+        """Test that the OpenAI service scopes cached answers by the serving bot."""
+        from unittest.mock import AsyncMock, Mock, patch
+
+        from app.services.openai_service import OpenAIService
+
+        response = Mock()
+        response.choices = [Mock(message=Mock(content="Use reversed()"))]
+        response.usage.total_tokens = 42
+        client = Mock()
+        client.chat.completions.create = AsyncMock(return_value=response)
+        prompt = "How do I reverse a list in Python?"
+
+        with (
+            patch("app.services.openai_service.prompt_cache", PromptCache(100, 2**20)),
+            patch("app.services.openai_service.get_openai_client", return_value=client),
+            patch("app.services.openai_service.settings.openai_api_key", "sk-test"),
+            patch.object(OpenAIService, "count_tokens", return_value=10),
+        ):
+            service = OpenAIService()
+            await service.generate_response(prompt, ROLE, MODEL, bot_id=1)
+            _, other_bot_tokens = await service.generate_response(prompt, ROLE, MODEL, bot_id=2)
+            _, same_bot_tokens = await service.generate_response(prompt, ROLE, MODEL, bot_id=1)
+
+        assert other_bot_tokens == 42  # Generated again for the other bot
+        assert same_bot_tokens == 0  # Served from the cache
+        assert client.chat.completions.create.await_count == 2
@@ -0,0 +1,117 @@
+"""
+Tests for role presets and the role registry.
+"""
+
+from sqlalchemy import inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.config import settings
+from app.database import (
+    DEFAULT_ROLE_NAME,
+    Role,
+    User,
+    UserRole,
+    assign_role,
+    get_or_create_user_role,
+    upgrade_schema,
+)
+from app.services.role_registry import RoleRegistry
+
+
+async def create_user(session: AsyncSession, telegram_id: int) -> User:
+    """Create and persist a user."""
+    user = User(telegram_id=telegram_id, username=f"user{telegram_id}")
+    session.add(user)
+    await session.commit()
+    return user
+
+
+class TestRoleRegistry:
+    """Test cases for role registry."""
+
+    async def test_new_user_references_default_preset(self, test_session: AsyncSession) -> None:
+        """Test that new users point at the shared preset instead of copying its prompt."""
+        user = await create_user(test_session, 1)
+
+        user_role = await get_or_create_user_role(test_session, user.id)
+
+        assert user_role.role_prompt is None
+        role = await test_session.get(Role, user_role.role_id)
+        assert role is not None
+        assert role.name == DEFAULT_ROLE_NAME
+        assert role.prompt == settings.default_role_prompt
+
+    async def test_load_interns_copied_prompts(self, test_session: AsyncSession) -> None:
+        """Test that verbatim copies of preset prompts are replaced by references."""
+        user = await create_user(test_session, 2)
+        test_session.add(UserRole(user_id=user.id, role_prompt=settings.default_role_prompt))
+        await test_session.commit()
+
+        registry = RoleRegistry()
+        await registry.load(test_session)
+
+        user_role = (await test_session.execute(select(UserRole))).scalar_one()
+        await test_session.refresh(user_role)
+        assert user_role.role_prompt is None
+        assert user_role.role_id is not None
+        assert len(registry) == 1
+
+        prompt, tokens = await registry.resolve(test_session, user_role, "gpt-3.5-turbo")
+        assert prompt == settings.default_role_prompt
+        assert tokens is not None and tokens > 0
+
+    async def test_custom_prompt_is_kept(self, test_session: AsyncSession) -> None:
+        """Test that custom per-user prompts are still supported."""
+        user = await create_user(test_session, 3)
+        user_role = UserRole(user_id=user.id, role_name="pirate", role_prompt="Talk like a pirate.")
+        test_session.add(user_role)
+        await test_session.commit()
+
+        registry = RoleRegistry()
+        await registry.load(test_session)
+        prompt, tokens = await registry.resolve(test_session, user_role, "gpt-3.5-turbo")
+
+        assert prompt == "Talk like a pirate."
+        assert tokens is None
+
+    async def test_assign_role_in_bulk(self, test_session: AsyncSession) -> None:
+        """Test that a preset can be assigned to many users in one statement."""
+        users = [await create_user(test_session, telegram_id) for telegram_id in (10, 11, 12)]
+        for user in users:
+            await get_or_create_user_role(test_session, user.id)
+        coder = Role(name="coder", prompt="You are a senior engineer.")
+        test_session.add(coder)
+        await test_session.commit()
+
+        updated = await assign_role(test_session, coder, [users[0].id, users[1].id])
+
+        assert updated == 2
+        result = await test_session.execute(
+            select(UserRole.role_name)
+            .order_by(UserRole.user_id)
+            .execution_options(populate_existing=True)
+        )
+        assert list(result.scalars()) == ["coder", "coder", DEFAULT_ROLE_NAME]
+
+
+class TestUpgradeSchema:
+    """Test cases for in-place schema upgrades."""
+
+    async def test_missing_columns_are_added(self) -> None:
+        """Test that columns added to models are created on existing tables."""
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.execute(
+                text(
+                    "CREATE TABLE user_roles (id INTEGER PRIMARY KEY, user_id INTEGER, "
+                    "role_name VARCHAR(50), role_prompt TEXT NOT NULL, "
+                    "created_at DATETIME, updated_at DATETIME)"
+                )
+            )
+            await conn.run_sync(upgrade_schema)
+            columns = await conn.run_sync(
+                lambda sync_conn: {c["name"] for c in inspect(sync_conn).get_columns("user_roles")}
+            )
+        await engine.dispose()
+
+        assert "role_id" in columns
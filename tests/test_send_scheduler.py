@@ -0,0 +1,88 @@
+"""
+Tests for outbound Telegram send scheduler.
+"""
+
+import time
+from unittest.mock import AsyncMock
+
+import pytest
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, SendChatAction, SendMessage
+
+from app.services.send_scheduler import SendScheduler, TokenBucket
+
+
+class TestTokenBucket:
+    """Test cases for token bucket."""
+
+    async def test_bucket_throttles_after_burst(self) -> None:
+        """Test that bucket waits once capacity is exhausted."""
+        bucket = TokenBucket(rate=20.0, capacity=1.0)
+
+        started = time.monotonic()
+        await bucket.acquire()
+        await bucket.acquire()
+        elapsed = time.monotonic() - started
+
+        assert elapsed >= 0.04  # second token needs ~1/20 s
+
+
+class TestSendScheduler:
+    """Test cases for send scheduler middleware."""
+
+    async def test_redundant_chat_actions_are_merged(self, mock_bot: Bot) -> None:
+        """Test that repeated typing actions within TTL hit the API once."""
+        scheduler = SendScheduler(chat_action_ttl=5.0)
+        make_request = AsyncMock(return_value=Response[bool](ok=True, result=True))
+        method = SendChatAction(chat_id=1, action="typing")
+
+        await scheduler(make_request, mock_bot, method)
+        response = await scheduler(make_request, mock_bot, method)
+
+        assert response.result is True
+        assert make_request.await_count == 1
+        assert scheduler.merged_chat_actions == 1
+
+    async def test_message_resets_chat_action(self, mock_bot: Bot) -> None:
+        """Test that chat action is sent again after a message to the chat."""
+        scheduler = SendScheduler(chat_rate=1000.0, chat_action_ttl=5.0)
+        make_request = AsyncMock(return_value=Response[bool](ok=True, result=True))
+        action = SendChatAction(chat_id=1, action="typing")
+
+        other_chat_action = SendChatAction(chat_id=2, action="typing")
+
+        await scheduler(make_request, mock_bot, action)
+        await scheduler(make_request, mock_bot, other_chat_action)
+        await scheduler(make_request, mock_bot, SendMessage(chat_id=1, text="hi"))
+        await scheduler(make_request, mock_bot, action)
+        await scheduler(make_request, mock_bot, other_chat_action)
+
+        # Only the chat that received the message shows the action again
+        assert make_request.await_count == 4
+        assert scheduler.merged_chat_actions == 1
+
+    async def test_retry_after_is_retried(self, mock_bot: Bot) -> None:
+        """Test that RetryAfter errors are retried transparently."""
+        scheduler = SendScheduler(chat_rate=1000.0, max_retries=2)
+        method = SendMessage(chat_id=1, text="hi")
+        ok = Response[bool](ok=True, result=True)
+        make_request = AsyncMock(
+            side_effect=[TelegramRetryAfter(method=method, message="flood", retry_after=0), ok]
+        )
+
+        response = await scheduler(make_request, mock_bot, method)
+
+        assert response is ok
+        assert scheduler.retried == 1
+
+    async def test_retry_after_gives_up(self, mock_bot: Bot) -> None:
+        """Test that RetryAfter is re-raised when retries are exhausted."""
+        scheduler = SendScheduler(chat_rate=1000.0, max_retries=0)
+        method = SendMessage(chat_id=1, text="hi")
+        make_request = AsyncMock(
+            side_effect=TelegramRetryAfter(method=method, message="flood", retry_after=0)
+        )
+
+        with pytest.raises(TelegramRetryAfter):
+            await scheduler(make_request, mock_bot, method)
@@ -0,0 +1,80 @@
+"""
+Tests for graceful shutdown coordination.
+"""
+
+import asyncio
+
+from app.shutdown import ShutdownCoordinator
+
+
+class TestShutdownCoordinator:
+    """Test cases for draining in-flight updates."""
+
+    async def test_drain_waits_for_fast_and_cancels_slow_tasks(self) -> None:
+        """Test that tasks finishing within grace period complete, others are cancelled."""
+        coordinator = ShutdownCoordinator(grace_period=0.2)
+        completed: list[str] = []
+
+        async def handler(name: str, delay: float) -> None:
+            await asyncio.sleep(delay)
+            completed.append(name)
+
+        coordinator.track(asyncio.create_task(handler("fast", 0.01)))
+        slow = asyncio.create_task(handler("slow", 10))
+        coordinator.track(slow)
+
+        coordinator.request_shutdown()
+        report = await coordinator.drain()
+
+        assert not coordinator.accepting
+        assert report.finished == 1
+        assert report.cancelled == 1
+        assert completed == ["fast"]
+        assert slow.cancelled()
+        assert coordinator.in_flight == 0
+
+    async def test_flush_hooks_release_held_work_before_waiting(self) -> None:
+        """Test that flush hooks run before the wait, even if one fails."""
+        coordinator = ShutdownCoordinator(grace_period=1)
+        released = asyncio.Event()
+
+        async def failing_hook() -> None:
+            raise RuntimeError("boom")
+
+        async def flush_hook() -> None:
+            released.set()
+
+        coordinator.add_flush_hook(failing_hook)
+        coordinator.add_flush_hook(flush_hook)
+        coordinator.track(asyncio.create_task(released.wait()))
+
+        report = await coordinator.drain()
+
+        assert report.finished == 1
+        assert report.cancelled == 0
+
+    async def test_open_debounce_windows_are_flushed(self) -> None:
+        """Test that a debounced message is answered on shutdown instead of cancelled."""
+        from aiogram import types
+
+        from app.services.debounce import MessageDebouncer
+
+        debouncer = MessageDebouncer(window_ms=60_000, max_delay_ms=60_000)
+        coordinator = ShutdownCoordinator(grace_period=1)
+        coordinator.add_flush_hook(debouncer.flush)
+        message = types.Message(
+            message_id=1,
+            date=1640995200,
+            chat=types.Chat(id=1, type="private"),
+            text="held",
+        )
+        leader = asyncio.create_task(debouncer.collect(message))
+        coordinator.track(leader)
+        await asyncio.sleep(0)
+
+        report = await coordinator.drain()
+
+        assert report.cancelled == 0
+        assert leader.result() == (message, "held")
+        # Messages arriving while draining are not held again
+        assert await debouncer.collect(message) == (message, "held")
@@ -0,0 +1,157 @@
+"""
+Tests for admin usage statistics.
+"""
+
+import asyncio
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock, Mock
+
+from aiogram.types import User as TelegramUser
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from app.database import Conversation, User
+from app.services.stats import StatsService, StatsSnapshot, compute_snapshot
+
+
+async def seed(session: AsyncSession, now: datetime) -> None:
+    """Create conversations spread over the reporting windows."""
+    alice = User(telegram_id=1, username="alice")
+    bob = User(telegram_id=2, username="bob")
+    session.add_all([alice, bob])
+    await session.flush()
+
+    def conversation(user: User, age: timedelta, model: str, tokens: int, response: str):
+        return Conversation(
+            user_id=user.id,
+            user_message="q",
+            ai_response=response,
+            model_used=model,
+            tokens_used=tokens,
+            role_used="helpful_assistant",
+            created_at=now - age,
+        )
+
+    session.add_all(
+        [
+            conversation(alice, timedelta(minutes=10), "gpt-4o", 100, "a" * 10),
+            conversation(alice, timedelta(hours=5), "gpt-4o", 50, "a" * 20),
+            conversation(bob, timedelta(days=2), "gpt-3.5-turbo", 30, "a" * 30),
+            conversation(bob, timedelta(days=30), "gpt-3.5-turbo", 999, "a" * 99),
+        ]
+    )
+    await session.commit()
+
+
+class TestStatsSnapshot:
+    """Test cases for SQL aggregates."""
+
+    async def test_compute_snapshot_windows(self, test_session: AsyncSession) -> None:
+        """Test per-window users, model usage and median response length."""
+        now = datetime.now(UTC).replace(tzinfo=None)
+        await seed(test_session, now)
+
+        snapshot = await compute_snapshot(test_session, now=now)
+
+        hour, day, week = (snapshot.windows[name] for name in ("1h", "24h", "7d"))
+        assert hour.active_users == 1
+        assert hour.models["gpt-4o"].messages == 1
+        assert hour.models["gpt-4o"].tokens == 100
+        assert "gpt-3.5-turbo" not in hour.models
+
+        assert day.models["gpt-4o"].messages == 2
+        assert day.p50_response_length == 10
+
+        assert week.active_users == 2
+        assert week.models["gpt-3.5-turbo"].tokens == 30  # 30-day-old row excluded
+        assert week.p50_response_length == 20
+        assert "gpt-4o: 2 messages, 150 tokens" in snapshot.format()
+
+
+class TestStatsService:
+    """Test cases for lazy snapshot refresh."""
+
+    async def test_nothing_is_queried_before_first_use(self, test_engine: AsyncEngine) -> None:
+        """Test that starting the service runs no aggregates until a snapshot is requested."""
+        service = StatsService(interval=300)
+        service.start(async_sessionmaker(test_engine, expire_on_commit=False))
+
+        assert service.snapshot is None
+
+        snapshot = await service.get_snapshot()
+
+        assert snapshot is not None
+        assert not service.is_stale
+
+    async def test_stale_snapshot_is_served_while_refreshing(
+        self, test_engine: AsyncEngine
+    ) -> None:
+        """Test that a stale snapshot is returned at once and replaced by one refresh."""
+        service = StatsService(async_sessionmaker(test_engine, expire_on_commit=False), interval=0)
+        first = await service.get_snapshot()
+
+        served = await service.get_snapshot()
+        again = await service.get_snapshot()  # Refresh already running, no second one
+        refreshed = await service._task
+
+        assert served is first and again is first
+        assert refreshed is not None and refreshed is not first
+        await service.stop()
+
+    async def test_concurrent_cold_calls_compute_once(
+        self, test_engine: AsyncEngine, monkeypatch
+    ) -> None:
+        """Test that calls arriving before the first snapshot share a single computation."""
+        computed = 0
+
+        async def counting_compute(session: AsyncSession) -> StatsSnapshot:
+            nonlocal computed
+            computed += 1
+            return await compute_snapshot(session)
+
+        monkeypatch.setattr("app.services.stats.compute_snapshot", counting_compute)
+        service = StatsService(
+            async_sessionmaker(test_engine, expire_on_commit=False), interval=300
+        )
+
+        first, second = await asyncio.gather(service.get_snapshot(), service.get_snapshot())
+
+        assert computed == 1
+        assert first is not None and first is second
+
+
+class TestStatsHandler:
+    """Test cases for /stats command."""
+
+    async def test_stats_served_from_snapshot(
+        self, test_engine: AsyncEngine, telegram_user: TelegramUser, monkeypatch
+    ) -> None:
+        """Test that /stats answers admins from the cached snapshot without querying."""
+        from app.handlers import stats_handler
+
+        service = StatsService(async_sessionmaker(test_engine, expire_on_commit=False))
+        await service.refresh()
+        service.session_factory = None  # Any further DB access would be a bug
+        monkeypatch.setattr("app.handlers.stats_service", service)
+        monkeypatch.setattr("app.handlers.settings.admin_ids", [telegram_user.id])
+
+        message = Mock()
+        message.from_user = telegram_user
+        message.answer = AsyncMock()
+
+        await stats_handler(message)
+        await stats_handler(message)
+
+        assert message.answer.await_count == 2
+        assert "Usage statistics" in message.answer.call_args[0][0]
+
+    async def test_stats_ignored_for_non_admins(self, telegram_user: TelegramUser) -> None:
+        """Test that non-admin users get no answer."""
+        from app.handlers import stats_handler
+
+        message = Mock()
+        message.from_user = telegram_user
+        message.answer = AsyncMock()
+
+        await stats_handler(message)
+
+        message.answer.assert_not_called()
@@ -0,0 +1,178 @@
+"""
+Tests for multi-bot tenancy.
+"""
+
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from aiogram.types import User as TelegramUser
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.config import BotConfig, settings
+from app.database import (
+    DEFAULT_ROLE_NAME,
+    Base,
+    User,
+    adopt_unscoped_users,
+    get_or_create_user_role,
+    upgrade_schema,
+)
+from app.handlers import get_or_create_user
+from app.main import create_webhook_app
+from app.shutdown import ShutdownCoordinator
+from app.tenants import TenantRegistry, load_tenants
+
+SUPPORT_TOKEN = "111111:AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA"
+SALES_TOKEN = "222222:BBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBB"
+
+
+class TestTenantConfig:
+    """Test cases for tenant configuration."""
+
+    def test_single_bot_mode_uses_global_settings(self) -> None:
+        """Test that without BOTS a single tenant is built from global settings."""
+        (tenant,) = load_tenants([])
+
+        assert tenant.project_name == settings.project_name
+        assert tenant.default_role_name == DEFAULT_ROLE_NAME
+        assert tenant.default_role_prompt == settings.default_role_prompt
+
+    def test_per_bot_settings(self) -> None:
+        """Test that bots keep their own name, role and Telegram bot id."""
+        support, sales = load_tenants(
+            [
+                BotConfig(name="support", token=SUPPORT_TOKEN, project_name="Support Bot"),
+                BotConfig(name="sales", token=SALES_TOKEN, default_role_prompt="You sell."),
+            ]
+        )
+
+        assert (support.bot_id, sales.bot_id) == (111111, 222222)
+        assert support.project_name == "Support Bot"
+        assert sales.project_name == settings.project_name
+        assert support.default_role_name == DEFAULT_ROLE_NAME
+        assert sales.default_role_name == "sales_assistant"
+        assert sales.default_role_prompt == "You sell."
+
+    def test_conflicting_role_prompts_rejected(self) -> None:
+        """Test that one role name cannot be configured with two prompts."""
+        with pytest.raises(ValueError, match="different prompts"):
+            load_tenants(
+                [
+                    BotConfig(
+                        name="a",
+                        token=SUPPORT_TOKEN,
+                        default_role_name="x",
+                        default_role_prompt="1",
+                    ),
+                    BotConfig(
+                        name="b", token=SALES_TOKEN, default_role_name="x", default_role_prompt="2"
+                    ),
+                ]
+            )
+
+    def test_registry_resolves_bot(self) -> None:
+        """Test that the tenant is looked up by bot id with the primary as fallback."""
+        registry = TenantRegistry(
+            load_tenants(
+                [
+                    BotConfig(name="support", token=SUPPORT_TOKEN),
+                    BotConfig(name="sales", token=SALES_TOKEN),
+                ]
+            )
+        )
+
+        assert registry.get(Mock(id=222222)).name == "sales"
+        assert registry.get(Mock(id=999)).name == "support"
+        assert registry.get(None).name == "support"
+
+
+class TestTenantIsolation:
+    """Test cases for per-bot data."""
+
+    async def test_same_telegram_user_is_separate_per_bot(
+        self, test_session: AsyncSession, telegram_user: TelegramUser
+    ) -> None:
+        """Test that each bot gets its own user row and default role."""
+        support = await get_or_create_user(test_session, telegram_user, 111111)
+        sales = await get_or_create_user(test_session, telegram_user, 222222)
+        again = await get_or_create_user(test_session, telegram_user, 111111)
+
+        assert support.id != sales.id
+        assert again.id == support.id
+
+        role = await get_or_create_user_role(test_session, sales.id, "sales_assistant", "You sell.")
+        assert role.role_name == "sales_assistant"
+
+    async def test_adopt_unscoped_users(self, test_session: AsyncSession) -> None:
+        """Test that users from before multi-bot mode move to the primary bot."""
+        test_session.add_all([User(telegram_id=1), User(telegram_id=2, bot_id=222222)])
+        await test_session.commit()
+
+        assert await adopt_unscoped_users(test_session, 111111) == 1
+
+        result = await test_session.execute(select(User.bot_id).order_by(User.telegram_id))
+        assert result.scalars().all() == [111111, 222222]
+
+    async def test_upgrade_relaxes_unique_telegram_id(self) -> None:
+        """Test that a pre-tenancy users table is upgraded to per-bot uniqueness."""
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+        async with engine.begin() as conn:
+            await conn.execute(
+                text(
+                    "CREATE TABLE users (id INTEGER PRIMARY KEY, telegram_id BIGINT NOT NULL, "
+                    "username VARCHAR(255), first_name VARCHAR(255), last_name VARCHAR(255), "
+                    "is_active BOOLEAN NOT NULL, language_code VARCHAR(10), "
+                    "created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL)"
+                )
+            )
+            await conn.execute(
+                text("CREATE UNIQUE INDEX ix_users_telegram_id ON users (telegram_id)")
+            )
+            await conn.execute(
+                text(
+                    "INSERT INTO users (telegram_id, is_active, created_at, updated_at) "
+                    "VALUES (1, 1, '2025-01-01', '2025-01-01')"
+                )
+            )
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(upgrade_schema)
+
+            indexes = await conn.run_sync(
+                lambda sync_conn: {
+                    i["name"]: i["unique"] for i in inspect(sync_conn).get_indexes("users")
+                }
+            )
+            # The same Telegram user can now talk to a second bot
+            await conn.execute(
+                text(
+                    "INSERT INTO users (bot_id, telegram_id, is_active, created_at, updated_at) "
+                    "VALUES (222222, 1, 1, '2025-01-01', '2025-01-01')"
+                )
+            )
+            bot_ids = (await conn.execute(text("SELECT bot_id FROM users ORDER BY id"))).all()
+        await engine.dispose()
+
+        assert not indexes["ix_users_telegram_id"]
+        assert indexes["uq_users_bot_id_telegram_id"]
+        assert [row[0] for row in bot_ids] == [0, 222222]
+
+
+class TestWebhookRoutes:
+    """Test cases for per-bot webhook paths."""
+
+    async def test_updates_are_fed_to_the_bot_of_the_path(self) -> None:
+        """Test that each webhook path feeds updates to its own bot."""
+        dp = Mock(feed_update=AsyncMock())
+        support, sales = Mock(name="support"), Mock(name="sales")
+        app = create_webhook_app(
+            dp, {"/webhook/support": support, "/webhook/sales": sales}, ShutdownCoordinator()
+        )
+
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.post("/webhook/sales", json={"update_id": 1})
+
+        assert response.status_code == 200
+        assert dp.feed_update.await_args[0][0] is sales